@@ -2,12 +2,22 @@ import os
 from flask import Flask
 from flasgger import Swagger
 from models import db
+from models.routing import init_read_replicas, replica_binds
+from models.sharding import init_shards, shard_binds
 from flask_migrate import Migrate
 
 def init_extensions(app):
     # Inicializa o SQLAlchemy
     db.init_app(app)
-    Migrate(app, db)
+    # render_as_batch: o SQLite só altera colunas recriando a tabela
+    Migrate(app, db, render_as_batch=True)
+    # Leituras (GET) vão para as réplicas configuradas, se houver
+    init_read_replicas(app)
+    # Posts particionados entre vários bancos, se configurado
+    init_shards(app)
+
+    from controllers.idempotency import init_idempotency
+    init_idempotency(app)
     
     swagger_config = {
         "headers": [],
@@ -29,17 +39,63 @@ def register_blueprints(app):
     from controllers.auth import auth_bp
     from controllers.user import user_bp
     from controllers.post import post_bp
+    from controllers.feed import feed_bp
+    from controllers.change import change_bp
+    from controllers.profiling import profiling_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(user_bp)
     app.register_blueprint(post_bp)
+    app.register_blueprint(feed_bp)
+    app.register_blueprint(change_bp)
+    app.register_blueprint(profiling_bp)
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
 
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///socialmedia.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.secret_key = os.getenv('SECRET_KEY', 'SUA_CHAVE_SECRETA')
+    # Acima desse número de seguidores o feed do autor é montado na leitura (fan-out-on-read)
+    app.config['FEED_FANOUT_LIMIT'] = int(os.getenv('FEED_FANOUT_LIMIT', '1000'))
+    app.config['FEED_BACKFILL'] = int(os.getenv('FEED_BACKFILL', '20'))
+    # Réplicas de leitura opcionais, separadas por vírgula
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(os.getenv('DATABASE_REPLICA_URIS', ''))
+    # Shards de posts opcionais, separados por vírgula (um banco por shard)
+    app.config['SQLALCHEMY_BINDS'].update(shard_binds(os.getenv('POST_SHARD_URIS', '')))
+    # Com shards, contador, feed e log dos posts novos são aplicados no banco principal
+    # em lote por uma thread (a cada post e a cada intervalo); 0 deixa só para scripts
+    app.config['POST_OUTBOX_APPLIER'] = os.getenv('POST_OUTBOX_APPLIER', '1') == '1'
+    app.config['POST_OUTBOX_INTERVAL_MS'] = float(os.getenv('POST_OUTBOX_INTERVAL_MS', '1000'))
+    app.config['POST_OUTBOX_WINDOW_MS'] = float(os.getenv('POST_OUTBOX_WINDOW_MS', '20'))
+    app.config['POST_OUTBOX_BATCH'] = int(os.getenv('POST_OUTBOX_BATCH', '500'))
+    # Janela em que um cliente que acabou de escrever continua lendo do banco principal
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+    # Group commit opcional para criação de posts (lotes limitados por tamanho e tempo)
+    app.config['POST_WRITE_BATCHING'] = os.getenv('POST_WRITE_BATCHING', '0') == '1'
+    app.config['POST_BATCH_SIZE'] = int(os.getenv('POST_BATCH_SIZE', '64'))
+    app.config['POST_BATCH_WINDOW_MS'] = float(os.getenv('POST_BATCH_WINDOW_MS', '2'))
+    # Espera máxima da requisição pelo commit do lote (responde 503 depois disso)
+    app.config['POST_BATCH_TIMEOUT_MS'] = float(os.getenv('POST_BATCH_TIMEOUT_MS', '10000'))
+    # Respostas guardadas por Idempotency-Key: 'memory' (LRU do processo) ou 'database'
+    app.config['IDEMPOTENCY_STORE'] = os.getenv('IDEMPOTENCY_STORE', 'memory')
+    app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+    app.config['IDEMPOTENCY_MAX_KEYS'] = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '10000'))
+    # Cache da primeira página de GET /posts?limit=N (0 desativa)
+    app.config['POSTS_CACHE_SIZE'] = int(os.getenv('POSTS_CACHE_SIZE', '50'))
+    app.config['POSTS_CACHE_MAX_AGE'] = float(os.getenv('POSTS_CACHE_MAX_AGE', '30'))
+    # Posts a partir desse tamanho (bytes) são gravados comprimidos com zlib (0 desativa)
+    app.config['POST_COMPRESS_THRESHOLD'] = int(os.getenv('POST_COMPRESS_THRESHOLD', '1024'))
+    # Recarga do índice de usernames em memória, para ver cadastros de outros processos (0 desativa)
+    app.config['USERNAME_INDEX_REFRESH_SECONDS'] = float(os.getenv('USERNAME_INDEX_REFRESH_SECONDS', '300'))
+    # Profiling sob demanda (header X-Profile: 1 de um administrador); perfis em pstats
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', '1') == '1'
+    app.config['PROFILES_DIR'] = os.getenv('PROFILES_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['PROFILES_MAX_FILES'] = int(os.getenv('PROFILES_MAX_FILES', '100'))
+
+    # Configurações passadas antes de inicializar as extensões (usado nos testes)
+    if test_config:
+        app.config.update(test_config)
 
     init_extensions(app)
     register_blueprints(app)
@@ -0,0 +1,88 @@
+# Mede o efeito da compressão do conteúdo dos posts: tamanho do banco (I/O) e
+# memória/tempo para listar os posts com o texto inteiro ou só com uma prévia.
+# A base mistura posts curtos com textos de vários KB, como os das integrações.
+# Uso: python benchmarks/bench_compression.py [quantidade_de_posts]
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app import create_app
+from models import db, search
+from models.compression import preview_column, preview_text
+from models.post import Post
+from models.user import User
+
+VOCABULARY = [f'palavra{i}' for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+LONG_RATIO = 0.2
+PREVIEW = 200
+
+def make_contents(total):
+    random.seed(42)
+    contents = []
+    for _ in range(total):
+        words = random.randint(300, 1500) if random.random() < LONG_RATIO else 30
+        contents.append(' '.join(random.choices(VOCABULARY, WEIGHTS, k=words)))
+    return contents
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+def run(contents, threshold):
+    path = os.path.join(tempfile.mkdtemp(), 'bench_compression.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'POST_COMPRESS_THRESHOLD': threshold})
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password='x')
+        db.session.add(user)
+        db.session.commit()
+        # Insert pelo Core com a coluna tipada: passa pelo CompressedText
+        db.session.execute(Post.__table__.insert(), [
+            {'content': content, 'user_id': user.id} for content in contents
+        ])
+        db.session.commit()
+        db.session.execute(db.text('VACUUM'))
+        sizes = {'sem índice': os.path.getsize(path)}
+        # Com o índice de busca, como em produção (só termos, sem cópia do texto)
+        search.rebuild_index()
+        db.session.commit()
+        db.session.execute(db.text('VACUUM'))
+        sizes['com índice'] = os.path.getsize(path)
+
+        def full():
+            return [row.content for row in db.session.execute(select(Post.id, Post.content))]
+
+        def previews():
+            statement = select(Post.id, preview_column(Post.content, PREVIEW).label('content'))
+            return [preview_text(row.content, PREVIEW) for row in db.session.execute(statement)]
+
+        full()  # aquece o cache de páginas do SQLite
+        results = {'full': measure(full), 'preview': measure(previews)}
+    return sizes, results
+
+def main(total):
+    contents = make_contents(total)
+    raw = sum(len(content.encode('utf-8')) for content in contents)
+    print(f"{total} posts, {raw / 1024 / 1024:.1f} MB de texto")
+    for label, threshold in (('sem compressão', 0), ('com compressão', 1024)):
+        sizes, results = run(contents, threshold)
+        print(f"  {label}: " + ', '.join(
+            f"banco {name} {size / 1024 / 1024:.1f} MB" for name, size in sizes.items()
+        ))
+        for name, (elapsed, peak) in results.items():
+            print(f"    listagem {name:8}: {elapsed:8.1f} ms, pico de memória {peak:10.0f} KB")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,71 @@
+# Compara a criação de posts com um commit por requisição e com group commit
+# (POST_WRITE_BATCHING), com várias threads postando ao mesmo tempo num banco SQLite em arquivo.
+# Uso: python benchmarks/bench_group_commit.py [threads] [posts_por_thread]
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db
+from models.user import User
+
+def run(batching, threads, per_thread):
+    path = os.path.join(tempfile.mkdtemp(), 'bench_group_commit.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'POST_WRITE_BATCHING': batching,
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    latencies = []
+    failures = []
+    def worker():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        for i in range(per_thread):
+            start = time.perf_counter()
+            try:
+                # "database is locked" após o busy timeout vira 500, não derruba a thread
+                ok = client.post('/posts', json={'content': f'post {i}'}).status_code == 201
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures.append(i)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Vazão e latências só das requisições que gravaram o post
+    latencies.sort()
+    mode = 'group commit' if batching else 'commit por requisição'
+    if not latencies:
+        print(f"{mode:24} nenhum post gravado   falhas {len(failures)}")
+        return
+    print(f"{mode:24} {len(latencies) / elapsed:8.1f} posts/s   "
+          f"p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.2f} ms   "
+          f"falhas {len(failures)}")
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{threads} threads x {per_thread} posts")
+    run(False, threads, per_thread)
+    run(True, threads, per_thread)
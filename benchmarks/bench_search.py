@@ -0,0 +1,57 @@
+# Compara a busca FTS5 (bm25) com um LIKE '%termo%' sobre a tabela de posts.
+# O LIKE não ordena por relevância: para termos muito comuns ele para nos primeiros
+# 20 posts encontrados, enquanto o FTS5 precisa pontuar todos os documentos.
+# Uso: python benchmarks/bench_search.py [quantidade_de_posts]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, search
+from models.post import Post
+from models.user import User
+
+# Vocabulário sintético com distribuição de Zipf: poucas palavras muito comuns
+# e uma cauda longa de palavras raras, como em textos reais
+VOCABULARY = [f'palavra{i}' for i in range(20000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+QUERIES = ['palavra0', 'palavra50', 'palavra5000', 'palavra0 palavra50', 'inexistente']
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def main(total):
+    path = os.path.join(tempfile.mkdtemp(), 'bench_search.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    random.seed(42)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', password='x')
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(Post.__table__.insert(), [
+            {'content': ' '.join(random.choices(VOCABULARY, WEIGHTS, k=30)), 'user_id': user.id}
+            for _ in range(total)
+        ])
+        search.rebuild_index()
+        db.session.commit()
+
+        print(f"{total} posts")
+        for q in QUERIES:
+            fts_ms, fts_ids = timed(lambda: search.search_post_ids(q, 20), 20)
+            like_filter = [Post.content.like(f'%{term}%') for term in q.split()]
+            like_ms, like_ids = timed(
+                lambda: [post_id for (post_id,) in db.session.query(Post.id).filter(*like_filter)
+                         .order_by(Post.id.desc()).limit(20)], 20
+            )
+            print(f"  {q!r:20} fts5: {fts_ms:8.3f} ms ({len(fts_ids)})   like: {like_ms:8.3f} ms ({len(like_ids)})")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
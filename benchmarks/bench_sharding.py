@@ -0,0 +1,85 @@
+# Compara a criação de posts sem particionamento e com 2 e 4 shards, com várias
+# threads postando ao mesmo tempo (um autor por thread, bancos SQLite em arquivo).
+# Com shards a requisição só grava no shard do autor; o contador, o feed e o log
+# são aplicados em lote no banco principal pela thread do OutboxApplier, e o
+# tempo até tudo estar aplicado depois do último post também é medido.
+# Uso: python benchmarks/bench_sharding.py [threads] [posts_por_thread]
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from app import create_app
+from models import db
+from models.sharding import create_shard_tables
+from models.user import User
+
+def run(shards, threads, per_thread):
+    directory = tempfile.mkdtemp()
+    binds = {f'posts_shard_{i}': f'sqlite:///{directory}/posts_{i}.db' for i in range(shards)}
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{directory}/main.db',
+        'SQLALCHEMY_BINDS': binds,
+    })
+    with app.app_context():
+        db.create_all()
+        create_shard_tables()
+        users = [User(username=f'bench{i}', password='x') for i in range(threads)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+    latencies = []
+    failures = []
+    def worker(user_id):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        for i in range(per_thread):
+            start = time.perf_counter()
+            try:
+                response = client.post('/posts', json={'content': f'post {i}'})
+                ok = response.status_code == 201
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                failures.append(i)
+
+    workers = [threading.Thread(target=worker, args=(user_id,)) for user_id in user_ids]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Espera o contador de posts refletir todos os posts gravados
+    total = threads * per_thread
+    created = total - len(failures)
+    with app.app_context():
+        while db.session.execute(select(func.sum(User.post_count))).scalar() < created:
+            db.session.rollback()
+            time.sleep(0.005)
+    applied = time.perf_counter() - start - elapsed
+
+    latencies.sort()
+    mode = f'{shards} shards' if shards else 'sem particionamento'
+    print(f"{mode:20} {created / elapsed:8.1f} posts/s   "
+          f"p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.2f} ms   "
+          f"falhas {len(failures)}   aplicado {applied * 1000:6.1f} ms depois")
+    # O objeto db é global: remove os binds dos shards antes da próxima rodada
+    for key in binds:
+        db.metadatas.pop(key, None)
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{threads} threads x {per_thread} posts")
+    for shards in (0, 2, 4):
+        run(shards, threads, per_thread)
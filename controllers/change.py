@@ -0,0 +1,101 @@
+from flask import Blueprint, request, jsonify, session
+from models.change import Change
+from models.post import Post
+from models.user import User
+
+change_bp = Blueprint('change_bp', __name__)
+
+@change_bp.route('/changes', methods=['GET'])
+def list_changes():
+    """
+    Lista as alterações em posts e usuários posteriores ao cursor `since`.
+    Cada entidade aparece uma única vez por página, com seu estado atual; deleções
+    vêm como tombstones (data nulo). Envie o `cursor` retornado na próxima chamada.
+    ---
+    tags:
+      - Sincronização
+    parameters:
+      - in: query
+        name: since
+        type: integer
+        required: false
+      - in: query
+        name: limit
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Changes retrieved successfully
+        schema:
+          type: object
+          properties:
+            changes:
+              type: array
+              items:
+                type: object
+                properties:
+                  entity:
+                    type: string
+                  id:
+                    type: integer
+                  op:
+                    type: string
+                  data:
+                    type: object
+            cursor:
+              type: integer
+            has_more:
+              type: boolean
+      401:
+        description: Login required
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+
+    since = request.args.get('since', 0, type=int)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+
+    # Range na chave primária a partir do cursor; um registro extra indica se há mais
+    rows = Change.query.filter(Change.id > since).order_by(Change.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1].id if rows else since
+
+    # Mantém apenas a última alteração de cada entidade dentro da página
+    latest = {}
+    for change in rows:
+        latest.pop((change.entity, change.entity_id), None)
+        latest[(change.entity, change.entity_id)] = change
+
+    live = [change for change in latest.values() if change.op != 'delete']
+    posts = {
+        post.id: {
+            'id': post.id,
+            'content': post.content,
+            'author': {'id': author.id, 'username': author.username},
+            'updated_at': post.updated_at.isoformat()
+        }
+        for post, author in Post.load_many([c.entity_id for c in live if c.entity == 'post'])
+    }
+    user_ids = [c.entity_id for c in live if c.entity == 'user']
+    users = {
+        user.id: {
+            'id': user.id,
+            'username': user.username,
+            'is_admin': user.is_admin,
+            'updated_at': user.updated_at.isoformat()
+        }
+        for user in (User.query.filter(User.id.in_(user_ids)) if user_ids else [])
+    }
+
+    changes_list = []
+    for change in latest.values():
+        current = posts if change.entity == 'post' else users
+        changes_list.append({
+            'entity': change.entity,
+            'id': change.entity_id,
+            'op': change.op,
+            # Uma entidade deletada depois desta página também vem sem dados
+            'data': current.get(change.entity_id) if change.op != 'delete' else None
+        })
+    return jsonify({'changes': changes_list, 'cursor': cursor, 'has_more': has_more}), 200
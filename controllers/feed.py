@@ -0,0 +1,191 @@
+import heapq
+from flask import Blueprint, request, jsonify, session
+from sqlalchemy import false, select, tuple_
+from app import db
+from models.feed import FeedItem
+from models.follow import Follow
+from models.post import Post
+from models.sharding import group_by_shard
+from models.user import User
+from controllers.params import encode_cursor, parse_cursor, set_next_cursor
+
+feed_bp = Blueprint('feed_bp', __name__)
+
+@feed_bp.route('/users/<int:user_id>/follow', methods=['POST'])
+def follow_user(user_id):
+    """
+    Segue um usuário
+    ---
+    tags:
+      - Feed
+    parameters:
+      - in: path
+        name: user_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Following user
+      400:
+        description: Cannot follow yourself
+      401:
+        description: Login required
+      404:
+        description: User not found
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+
+    current_user_id = session['user_id']
+    if current_user_id == user_id:
+        return jsonify({'message': 'Cannot follow yourself'}), 400
+
+    followed = User.query.get_or_404(user_id)
+    if db.session.get(Follow, (current_user_id, user_id)):
+        return jsonify({'message': 'Following user'}), 200
+
+    db.session.add(Follow(follower_id=current_user_id, followed_id=user_id))
+    FeedItem.backfill(current_user_id, followed)
+    User.query.filter_by(id=user_id).update({User.follower_count: User.follower_count + 1})
+    db.session.commit()
+    return jsonify({'message': 'Following user'}), 200
+
+@feed_bp.route('/users/<int:user_id>/follow', methods=['DELETE'])
+def unfollow_user(user_id):
+    """
+    Deixa de seguir um usuário
+    ---
+    tags:
+      - Feed
+    parameters:
+      - in: path
+        name: user_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Unfollowed user
+      401:
+        description: Login required
+      404:
+        description: Not following user
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+
+    current_user_id = session['user_id']
+    follow = db.session.get(Follow, (current_user_id, user_id))
+    if not follow:
+        return jsonify({'message': 'Not following user'}), 404
+
+    db.session.delete(follow)
+    # Remove do feed os posts já distribuídos desse autor
+    FeedItem.query.filter_by(user_id=current_user_id, author_id=user_id).delete()
+    User.query.filter_by(id=user_id).update({User.follower_count: User.follower_count - 1})
+    db.session.commit()
+    return jsonify({'message': 'Unfollowed user'}), 200
+
+@feed_bp.route('/feed', methods=['GET'])
+def get_feed():
+    """
+    Timeline do usuário logado (posts próprios e de quem ele segue), do mais recente
+    para o mais antigo (por data de criação). Para a próxima página, envie em
+    `before` o cursor do header X-Next-Cursor (ausente na última página).
+    ---
+    tags:
+      - Feed
+    parameters:
+      - in: query
+        name: before
+        type: string
+        required: false
+      - in: query
+        name: limit
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Feed retrieved successfully
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              content:
+                type: string
+              author:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  username:
+                    type: string
+      400:
+        description: Invalid cursor
+      401:
+        description: Login required
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+
+    current_user_id = session['user_id']
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    # Os ids não seguem a data de criação entre shards: o cursor é a posição
+    # (created_at, id) do último post da página anterior
+    before = request.args.get('before')
+    position = None
+    if before is not None:
+        position = parse_cursor(before)
+        if position is None:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+    # Posts distribuídos na escrita: range no índice (user_id, created_at, post_id)
+    query = db.session.query(FeedItem.created_at, FeedItem.post_id).filter(FeedItem.user_id == current_user_id)
+    if position is not None:
+        query = query.filter(tuple_(FeedItem.created_at, FeedItem.post_id) < position)
+    materialized = query.order_by(FeedItem.created_at.desc(), FeedItem.post_id.desc()).limit(limit).all()
+
+    # Posts escritos sem fan-out (autor com muitos seguidores na época) são lidos
+    # agora, para todos os autores seguidos: o autor pode ter voltado a fazer
+    # fan-out depois, mas esses posts continuam fora dos feeds materializados
+    followed = [author_id for (author_id,) in db.session.query(Follow.followed_id).filter(
+        Follow.follower_id == current_user_id
+    )]
+    pulled = []
+    for bind_arguments, author_ids in group_by_shard(followed):
+        statement = select(Post.created_at, Post.id).where(
+            Post.user_id.in_(author_ids), Post.fanned_out == false()
+        )
+        if position is not None:
+            statement = statement.where(tuple_(Post.created_at, Post.id) < position)
+        pulled.append(db.session.execute(
+            statement.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit),
+            bind_arguments=bind_arguments
+        ).all())
+
+    post_ids = []
+    cursor = None
+    for created_at, post_id in heapq.merge(materialized, *pulled, key=tuple, reverse=True):
+        if post_id not in post_ids:
+            post_ids.append(post_id)
+        if len(post_ids) == limit:
+            cursor = encode_cursor(created_at, post_id)
+            break
+
+    posts_list = []
+    for post, author in Post.load_many(post_ids):
+        posts_list.append({
+            'id': post.id,
+            'content': post.content,
+            'author': {
+                'id': author.id,
+                'username': author.username
+            }
+        })
+    return set_next_cursor(jsonify(posts_list), cursor), 200
@@ -0,0 +1,147 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Response, current_app, jsonify, make_response, request, session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models.idempotency import IdempotencyKey
+
+# Resposta guardada para uma chave; status None enquanto a primeira requisição não terminou
+Saved = namedtuple('Saved', ['fingerprint', 'status', 'body'])
+
+# Tempo máximo de uma requisição em andamento antes da reserva ser considerada abandonada
+IN_PROGRESS_SECONDS = 60
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class MemoryIdempotencyStore:
+    """Store em memória (LRU com expiração), válido apenas dentro do processo."""
+
+    def __init__(self, ttl, max_keys):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(self, key, fingerprint):
+        # Devolve a resposta salva (ou em andamento) ou None se a chave foi reservada agora
+        now = utcnow()
+        with self._lock:
+            item = self._items.get(key)
+            if item and item[1] > now:
+                self._items.move_to_end(key)
+                return item[0]
+            self._items[key] = (Saved(fingerprint, None, None), now + timedelta(seconds=IN_PROGRESS_SECONDS))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_keys:
+                self._items.popitem(last=False)
+        return None
+
+    def complete(self, key, fingerprint, status, body):
+        with self._lock:
+            self._items[key] = (Saved(fingerprint, status, body), utcnow() + timedelta(seconds=self.ttl))
+
+    def release(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+class DatabaseIdempotencyStore:
+    """
+    Store na tabela idempotency_keys, compartilhado entre processos. Usa conexões
+    próprias, fora da transação da requisição, para que a reserva fique visível
+    imediatamente. Chaves expiradas são apagadas a cada `cleanup_every` reservas.
+    """
+
+    def __init__(self, ttl, cleanup_every=100):
+        self.ttl = ttl
+        self.cleanup_every = cleanup_every
+        self._reservations = 0
+
+    def reserve(self, key, fingerprint):
+        now = utcnow()
+        table = IdempotencyKey.__table__
+        try:
+            with db.engine.begin() as conn:
+                self._reservations += 1
+                if self._reservations % self.cleanup_every == 0:
+                    self.purge_expired(conn)
+                row = conn.execute(select(table).where(table.c.key == key)).first()
+                if row and row.expires_at > now:
+                    return Saved(row.fingerprint, row.status, row.body)
+                if row:
+                    conn.execute(delete(table).where(table.c.key == key))
+                conn.execute(insert(table).values(
+                    key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=IN_PROGRESS_SECONDS)
+                ))
+        except IntegrityError:
+            # Outro processo reservou a mesma chave ao mesmo tempo
+            return Saved(fingerprint, None, None)
+        return None
+
+    def complete(self, key, fingerprint, status, body):
+        table = IdempotencyKey.__table__
+        with db.engine.begin() as conn:
+            conn.execute(update(table).where(table.c.key == key).values(
+                status=status, body=body, expires_at=utcnow() + timedelta(seconds=self.ttl)
+            ))
+
+    def release(self, key):
+        table = IdempotencyKey.__table__
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.key == key))
+
+    def purge_expired(self, conn):
+        table = IdempotencyKey.__table__
+        conn.execute(delete(table).where(table.c.expires_at <= utcnow()))
+
+def init_idempotency(app):
+    ttl = app.config['IDEMPOTENCY_TTL_SECONDS']
+    if app.config['IDEMPOTENCY_STORE'] == 'database':
+        store = DatabaseIdempotencyStore(ttl)
+    else:
+        store = MemoryIdempotencyStore(ttl, app.config['IDEMPOTENCY_MAX_KEYS'])
+    app.extensions['idempotency_store'] = store
+
+def idempotent(view):
+    """
+    Com o header Idempotency-Key, a primeira resposta é guardada e as repetições
+    da mesma requisição recebem a resposta salva, sem executar a rota de novo.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        header = request.headers.get('Idempotency-Key')
+        if not header:
+            return view(*args, **kwargs)
+
+        store = current_app.extensions['idempotency_store']
+        # A chave vale por usuário e por rota
+        key = f"{session.get('user_id')}:{request.method}:{request.path}:{header}"
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+        saved = store.reserve(key, fingerprint)
+        if saved:
+            if saved.fingerprint != fingerprint:
+                return jsonify({'message': 'Idempotency-Key reused with a different request'}), 422
+            if saved.status is None:
+                return jsonify({'message': 'Request with this Idempotency-Key in progress'}), 409
+            replay = Response(saved.body, status=saved.status, mimetype='application/json')
+            replay.headers['Idempotent-Replayed'] = 'true'
+            return replay
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            store.release(key)
+            raise
+        if response.status_code >= 500:
+            # Erros do servidor não são guardados: o cliente pode tentar de novo
+            store.release(key)
+        else:
+            store.complete(key, fingerprint, response.status_code, response.get_data())
+        return response
+    return wrapper
@@ -0,0 +1,58 @@
+import base64
+from datetime import datetime
+
+MAX_IDS = 100
+# Maior inteiro que o SQLite aceita como parâmetro (64 bits com sinal)
+MAX_ID_VALUE = 2 ** 63 - 1
+MAX_PREVIEW = 1000
+# Header com o cursor da próxima página nas listagens paginadas por data
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+def parse_ids(value):
+    """
+    Converte "3,1,2" em [3, 1, 2], mantendo a ordem e removendo repetidos.
+    Retorna None se a lista for inválida, tiver mais de MAX_IDS ids ou algum id
+    fora de 1..MAX_ID_VALUE.
+    """
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        return None
+    ids = list(dict.fromkeys(ids))
+    if not ids or len(ids) > MAX_IDS:
+        return None
+    if any(id_ < 1 or id_ > MAX_ID_VALUE for id_ in ids):
+        return None
+    return ids
+
+def parse_preview(value):
+    # Tamanho da prévia do conteúdo (?preview=N), limitado a 1..MAX_PREVIEW; None = texto inteiro
+    if value is None:
+        return None
+    return max(1, min(value, MAX_PREVIEW))
+
+def encode_cursor(created_at, post_id):
+    """
+    Cursor opaco de paginação com a posição (created_at, id) do último post
+    entregue. Não depende de o post continuar existindo na próxima chamada.
+    """
+    raw = f'{created_at.isoformat()}|{post_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def parse_cursor(value):
+    # Devolve a posição (created_at, id) do cursor, ou None se ele for inválido
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode('utf-8')
+        created_at, post_id = raw.split('|')
+        position = (datetime.fromisoformat(created_at), int(post_id))
+    except ValueError:
+        return None
+    if position[1] < 1 or position[1] > MAX_ID_VALUE:
+        return None
+    return position
+
+def set_next_cursor(response, cursor):
+    # Sem cursor (última página) o header não é enviado
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return response
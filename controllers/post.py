@@ -1,12 +1,105 @@
-from flask import Blueprint, request, jsonify, session
+import heapq
+from collections import Counter
+from itertools import islice
+from flask import Blueprint, Response, request, jsonify, session, current_app
 import bcrypt
+from sqlalchemy import select, tuple_
 from app import db
+from models import search
+from models.cache_version import POSTS_VERSION, CacheVersion
+from models.change import Change
+from models.compression import preview_column, preview_text
+from models.feed import FeedItem
+from models.outbox import OutboxApplier, PostOutbox
 from models.post import Post
+from models.sharding import is_sharded, scan_shards, user_posts_bind
 from models.user import User
+from models.write_batcher import WriteBatcher
+from controllers.idempotency import idempotent
+from controllers.params import (
+    MAX_IDS, encode_cursor, parse_cursor, parse_ids, parse_preview, set_next_cursor
+)
+from controllers.response_cache import PageCache
 
 post_bp = Blueprint('post_bp', __name__)
 
+def persist_posts(entries):
+    """
+    Grava uma lista de posts [(user_id, content), ...] na sessão atual, com os
+    contadores, o feed, o índice de busca e o log de alterações. Não faz commit.
+    Com particionamento só o shard do autor é alterado: o contador, o feed e o
+    log ficam como pendências (PostOutbox) na mesma transação do post e são
+    aplicados depois no banco principal, em lote, pelo OutboxApplier.
+    """
+    authors = {
+        user.id: user
+        for user in User.query.filter(User.id.in_({user_id for user_id, _ in entries}))
+    }
+    new_posts = [
+        Post(content=content, user_id=user_id, fanned_out=FeedItem.is_fanout_author(authors[user_id]))
+        for user_id, content in entries
+    ]
+    db.session.add_all(new_posts)
+    db.session.flush()
+    if is_sharded():
+        for new_post in new_posts:
+            search.index_post(new_post)
+            db.session.add(PostOutbox(post_id=new_post.id, user_id=new_post.user_id))
+        return [new_post.id for new_post in new_posts]
+    for user_id, count in Counter(user_id for user_id, _ in entries).items():
+        User.adjust_post_count(user_id, count)
+    for new_post in new_posts:
+        # Distribui o post para o feed materializado dos seguidores
+        FeedItem.fan_out(new_post, authors[new_post.user_id])
+        search.index_post(new_post)
+        Change.record('post', new_post.id, 'insert')
+    CacheVersion.bump(POSTS_VERSION)
+    return [new_post.id for new_post in new_posts]
+
+@post_bp.record_once
+def init_write_batching(state):
+    # Modo opcional de group commit: posts de requisições concorrentes num só commit
+    app = state.app
+    if app.config['POST_WRITE_BATCHING']:
+        app.extensions['post_write_batcher'] = WriteBatcher(
+            app, persist_posts,
+            max_size=app.config['POST_BATCH_SIZE'],
+            window=app.config['POST_BATCH_WINDOW_MS'] / 1000,
+            timeout=app.config['POST_BATCH_TIMEOUT_MS'] / 1000
+        )
+
+@post_bp.record_once
+def init_post_outbox(state):
+    # Com particionamento, aplica no banco principal as pendências gravadas nos shards
+    app = state.app
+    if app.config['POST_SHARDS']:
+        app.extensions['post_outbox_applier'] = OutboxApplier(
+            app, app.config['POST_OUTBOX_INTERVAL_MS'] / 1000, app.config['POST_OUTBOX_WINDOW_MS'] / 1000
+        )
+
+def posts_committed():
+    # Chamado depois do commit de posts novos: a versão do cache só muda quando as
+    # pendências forem aplicadas, então o cache deste processo é limpo já
+    applier = current_app.extensions.get('post_outbox_applier')
+    if applier is None:
+        return
+    cache = current_app.extensions.get('posts_page_cache')
+    if cache is not None:
+        cache.clear()
+    if current_app.config['POST_OUTBOX_APPLIER']:
+        applier.notify()
+
+@post_bp.record_once
+def init_page_cache(state):
+    # Primeira página de GET /posts?limit=N guardada já serializada
+    app = state.app
+    if app.config['POSTS_CACHE_SIZE'] > 0:
+        app.extensions['posts_page_cache'] = PageCache(
+            app.config['POSTS_CACHE_SIZE'], app.config['POSTS_CACHE_MAX_AGE']
+        )
+
 @post_bp.route('/posts', methods=['POST'])
+@idempotent
 def create_post():
     """
     Cria um post para o usuário logado
@@ -22,19 +115,39 @@ def create_post():
           properties:
             content:
               type: string
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
     responses:
       201:
         description: Post created successfully
       401:
         description: Login required
+      409:
+        description: Request with this Idempotency-Key in progress
+      422:
+        description: Idempotency-Key reused with a different request
+      503:
+        description: Post write timed out (group commit)
     """
     if 'user_id' not in session:
         return jsonify({'message': 'Login required'}), 401
     
     data = request.get_json()
-    new_post = Post(content=data['content'], user_id=session['user_id'])
-    db.session.add(new_post)
-    db.session.commit()
+    entry = (session['user_id'], data['content'])
+    batcher = current_app.extensions.get('post_write_batcher')
+    if batcher:
+        # Responde só depois que o lote com este post foi gravado
+        try:
+            batcher.submit(entry)
+        except TimeoutError:
+            # O post continua na fila e ainda pode ser gravado depois desta resposta
+            return jsonify({'message': 'Post write timed out'}), 503
+    else:
+        persist_posts([entry])
+        db.session.commit()
+    posts_committed()
     return jsonify({'message': 'Post created successfully'}), 201
 
 @post_bp.route('/posts/<int:post_id>', methods=['PUT'])
@@ -69,7 +182,7 @@ def edit_post(post_id):
     if 'user_id' not in session:
         return jsonify({'message': 'Login required'}), 401
     
-    post = Post.query.get_or_404(post_id)
+    post = Post.get_or_404(post_id)
     current_user_id = session['user_id']
     current_user = User.query.get_or_404(current_user_id)
 
@@ -77,7 +190,12 @@ def edit_post(post_id):
         return jsonify({'message': 'Permission denied'}), 403
 
     data = request.get_json()
+    # O índice de busca precisa do texto antigo para retirá-lo
+    old_content = post.content
     post.content = data['content']
+    search.reindex_post(post, old_content)
+    Change.record('post', post.id, 'update')
+    CacheVersion.bump(POSTS_VERSION)
     db.session.commit()
     return jsonify({'message': 'Post updated successfully'}), 200
 
@@ -118,7 +236,7 @@ def get_post(post_id):
     if 'user_id' not in session:
         return jsonify({'message': 'Login required'}), 401
     
-    post = Post.query.get_or_404(post_id)
+    post = Post.get_or_404(post_id)
     # Obter dados do autor
     author = db.session.get(User, post.user_id)
     response = {
@@ -135,12 +253,42 @@ def get_post(post_id):
 def list_posts():
     """
     Lista todos os posts cadastrados, trazendo o autor (id e nome).
+    Com `ids` (ex.: ?ids=3,1,2) busca apenas esses posts, numa única consulta, e
+    responde {"posts": [...], "missing": [...]} na ordem pedida.
+    Com `limit` devolve os posts mais recentes primeiro (por data de criação);
+    para a próxima página, envie em `before` o cursor do header X-Next-Cursor
+    (ausente na última página). Só a primeira página com `limit` (sem `before` nem
+    `preview`) é servida do cache; sem `limit` a lista completa é lida de todos os
+    bancos a cada chamada.
+    Com `preview` (ex.: ?preview=200) o conteúdo vem cortado nesse número de
+    caracteres, com `truncated` indicando se há mais texto.
     ---
     tags:
       - Posts
+    parameters:
+      - in: query
+        name: ids
+        type: string
+        required: false
+      - in: query
+        name: limit
+        type: integer
+        required: false
+      - in: query
+        name: before
+        type: string
+        required: false
+      - in: query
+        name: preview
+        type: integer
+        required: false
     responses:
       200:
         description: List of posts retrieved successfully
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página (com `limit`)
         schema:
           type: array
           items:
@@ -157,30 +305,129 @@ def list_posts():
                     type: integer
                   username:
                     type: string
+      400:
+        description: Invalid ids or cursor
       401:
         description: Login required
     """
     if 'user_id' not in session:
         return jsonify({'message': 'Login required'}), 401
-    
-    posts = Post.query.all()
+
+    if 'ids' in request.args:
+        return get_posts_by_ids(request.args['ids'])
+
+    preview = parse_preview(request.args.get('preview', type=int))
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        before = request.args.get('before')
+        position = None
+        if before is not None:
+            position = parse_cursor(before)
+            if position is None:
+                return jsonify({'message': 'Invalid cursor'}), 400
+        return list_recent_posts(max(1, min(limit, 100)), position, preview)
+
+    # Com particionamento os shards são lidos em paralelo e intercalados por data (k-way merge)
+    statement = select(Post.id, post_content(preview), Post.user_id, Post.created_at).order_by(
+        Post.created_at, Post.id
+    )
+    posts = list(heapq.merge(*scan_shards(statement), key=lambda row: (row.created_at, row.id)))
+    return jsonify(serialize_posts(posts, preview)), 200
+
+def post_content(preview):
+    # Com `preview` só o começo do valor gravado é lido (e descomprimido)
+    if preview is None:
+        return Post.content
+    return preview_column(Post.content, preview).label('content')
+
+def content_fields(content, preview):
+    if preview is None:
+        return {'content': content}
+    text, truncated = preview_text(content, preview)
+    return {'content': text, 'truncated': truncated}
+
+def serialize_posts(posts, preview=None):
+    # Autores carregados numa única consulta, em vez de uma por post
+    authors = {
+        user.id: user
+        for user in User.query.filter(User.id.in_({post.user_id for post in posts}))
+    }
     posts_list = []
     for post in posts:
-        author = db.session.get(User, post.user_id)
+        author = authors.get(post.user_id)
+        if author is None:
+            # Autor removido sem os posts (ex.: shard indisponível na remoção)
+            continue
         posts_list.append({
             'id': post.id,
-            'content': post.content,
+            **content_fields(post.content, preview),
             'author': {
                 'id': author.id,
                 'username': author.username
             }
         })
-    return jsonify(posts_list), 200
+    return posts_list
+
+def recent_posts(limit, before=None, preview=None):
+    """
+    Posts mais recentes anteriores à posição `before` (created_at, id), junto com
+    o cursor da página que termina em cada um (None no último, se a listagem acabou).
+    """
+    statement = select(Post.id, post_content(preview), Post.user_id, Post.created_at)
+    if before is not None:
+        statement = statement.where(tuple_(Post.created_at, Post.id) < before)
+    statement = statement.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit)
+    merged = heapq.merge(*scan_shards(statement), key=lambda row: (row.created_at, row.id), reverse=True)
+    rows = list(islice(merged, limit))
+    posts_list = serialize_posts(rows, preview)
+    positions = {row.id: (row.created_at, row.id) for row in rows}
+    cursors = [encode_cursor(*positions[post['id']]) for post in posts_list]
+    if cursors and len(rows) < limit:
+        cursors[-1] = None
+    return posts_list, cursors
+
+def list_recent_posts(limit, before, preview=None):
+    cache = current_app.extensions.get('posts_page_cache')
+    if cache is None or before is not None or preview is not None or limit > cache.size:
+        posts_list, cursors = recent_posts(limit, before, preview)
+        return set_next_cursor(jsonify(posts_list), cursors[-1] if cursors else None), 200
+
+    # A versão é lida antes dos dados: se os dados vierem mais novos que ela,
+    # o pior caso é uma reconstrução a mais na próxima requisição
+    version = CacheVersion.current(POSTS_VERSION)
+    page = cache.get(version, limit)
+    if page is None:
+        posts_list, cursors = recent_posts(cache.size)
+        fragments = [current_app.json.dumps(post).encode('utf-8') for post in posts_list]
+        cache.store(version, fragments, cursors)
+        page = PageCache.render(fragments, cursors, limit)
+    body, cursor = page
+    return set_next_cursor(Response(body, mimetype='application/json'), cursor)
+
+def get_posts_by_ids(value):
+    post_ids = parse_ids(value)
+    if post_ids is None:
+        return jsonify({'message': f'Invalid ids (up to {MAX_IDS} comma separated integers)'}), 400
+
+    # Uma consulta IN com JOIN no autor (uma por shard, com particionamento)
+    rows = Post.load_many(post_ids)
+    found = {post.id for post, _ in rows}
+    posts_list = [{
+        'id': post.id,
+        'content': post.content,
+        'author': {
+            'id': author.id,
+            'username': author.username
+        }
+    } for post, author in rows]
+    missing = [post_id for post_id in post_ids if post_id not in found]
+    return jsonify({'posts': posts_list, 'missing': missing}), 200
 
 @post_bp.route('/posts/user/<int:user_id>', methods=['GET'])
 def list_posts_by_user(user_id):
     """
-    Lista todos os posts de um usuário específico.
+    Lista todos os posts de um usuário específico. Com `preview` o conteúdo vem
+    cortado nesse número de caracteres, como em GET /posts.
     ---
     tags:
       - Posts
@@ -189,6 +436,10 @@ def list_posts_by_user(user_id):
         name: user_id
         required: true
         type: integer
+      - in: query
+        name: preview
+        type: integer
+        required: false
     responses:
       200:
         description: List of posts by user retrieved successfully
@@ -211,8 +462,85 @@ def list_posts_by_user(user_id):
 
     # Certifica que o usuário existe
     User.query.get_or_404(user_id)
-    posts = Post.query.filter_by(user_id=user_id).all()
-    posts_list = [{'id': post.id, 'content': post.content} for post in posts]
+    preview = parse_preview(request.args.get('preview', type=int))
+    posts = db.session.execute(
+        select(Post.id, post_content(preview)).where(Post.user_id == user_id),
+        bind_arguments=user_posts_bind(user_id)
+    )
+    posts_list = [{'id': post.id, **content_fields(post.content, preview)} for post in posts]
+    return jsonify(posts_list), 200
+
+@post_bp.route('/posts/search', methods=['GET'])
+def search_posts():
+    """
+    Busca textual nos posts, ordenada por relevância (bm25).
+    ---
+    tags:
+      - Posts
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+      - in: query
+        name: limit
+        type: integer
+        required: false
+      - in: query
+        name: offset
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Matching posts retrieved successfully
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              content:
+                type: string
+              author:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                  username:
+                    type: string
+      400:
+        description: Query required
+      401:
+        description: Login required
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'message': 'Query required'}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    if search.is_enabled():
+        post_ids = search.search_post_ids(q, limit, offset)
+    else:
+        # Bancos sem FTS5: busca por LIKE, ordenada pelos mais recentes
+        post_ids = [post_id for (post_id,) in db.session.query(Post.id).filter(
+            Post.content.ilike(f'%{q}%')
+        ).order_by(Post.id.desc()).limit(limit).offset(offset)]
+
+    posts_list = []
+    for post, author in Post.load_many(post_ids):
+        posts_list.append({
+            'id': post.id,
+            'content': post.content,
+            'author': {
+                'id': author.id,
+                'username': author.username
+            }
+        })
     return jsonify(posts_list), 200
 
 @post_bp.route('/posts/<int:post_id>', methods=['DELETE'])
@@ -241,13 +569,18 @@ def delete_post(post_id):
     if 'user_id' not in session:
         return jsonify({'message': 'Login required'}), 401
 
-    post = Post.query.get_or_404(post_id)
+    post = Post.get_or_404(post_id)
     current_user_id = session['user_id']
     current_user = User.query.get_or_404(current_user_id)
     
     if post.user_id != current_user_id and not current_user.is_admin:
         return jsonify({'message': 'Permission denied'}), 403
 
+    FeedItem.query.filter_by(post_id=post.id).delete()
+    search.unindex_post(post)
     db.session.delete(post)
+    User.adjust_post_count(post.user_id, -1)
+    Change.record('post', post.id, 'delete')
+    CacheVersion.bump(POSTS_VERSION)
     db.session.commit()
     return jsonify({'message': 'Post deleted successfully'}), 200
\ No newline at end of file
@@ -0,0 +1,134 @@
+import cProfile
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, g, jsonify, request, send_from_directory, session
+from app import db
+from models.user import User
+
+profiling_bp = Blueprint('profiling_bp', __name__)
+
+# Nomes gerados por este módulo: <data>-<endpoint>-<id>.pstats
+PROFILE_NAME = re.compile(r'^[\w.-]+\.pstats$')
+
+def is_admin():
+    if 'user_id' not in session:
+        return False
+    user = db.session.get(User, session['user_id'])
+    return bool(user and user.is_admin)
+
+def profile_requested():
+    return request.headers.get('X-Profile') == '1' or request.args.get('_profile') == '1'
+
+@profiling_bp.before_app_request
+def start_profiler():
+    # Só perfila quando um administrador pede explicitamente; as demais requisições
+    # não pagam nada além desta verificação
+    if not current_app.config['PROFILING_ENABLED'] or not profile_requested() or not is_admin():
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Outro profiler já está ativo neste processo
+        return
+    g.profiler = profiler
+
+@profiling_bp.after_app_request
+def save_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+
+    directory = current_app.config['PROFILES_DIR']
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    name = f"{timestamp}-{request.endpoint or 'unknown'}-{uuid.uuid4().hex[:8]}.pstats"
+    profiler.dump_stats(os.path.join(directory, name))
+    prune_profiles(directory, current_app.config['PROFILES_MAX_FILES'])
+
+    response.headers['X-Profile-Id'] = name
+    return response
+
+@profiling_bp.teardown_app_request
+def stop_profiler(exception):
+    # Requisições que terminaram com exceção não passam pelo after_request
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+def prune_profiles(directory, max_files):
+    names = sorted(name for name in os.listdir(directory) if PROFILE_NAME.match(name))
+    for name in names[:-max_files]:
+        os.remove(os.path.join(directory, name))
+
+@profiling_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Lista os perfis gravados (somente administradores). Para perfilar uma
+    requisição, envie o header `X-Profile: 1` ou o parâmetro `?_profile=1`.
+    Os arquivos estão no formato pstats (python -m pstats, snakeviz, flameprof).
+    ---
+    tags:
+      - Administração
+    responses:
+      200:
+        description: Lista de perfis
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              name:
+                type: string
+              size:
+                type: integer
+      401:
+        description: Login required
+      403:
+        description: Permission denied
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+    if not is_admin():
+        return jsonify({'message': 'Permission denied'}), 403
+
+    directory = current_app.config['PROFILES_DIR']
+    names = sorted(
+        (name for name in os.listdir(directory) if PROFILE_NAME.match(name)), reverse=True
+    ) if os.path.isdir(directory) else []
+    profiles = [{'name': name, 'size': os.path.getsize(os.path.join(directory, name))} for name in names]
+    return jsonify(profiles), 200
+
+@profiling_bp.route('/admin/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    """
+    Baixa um perfil no formato pstats (somente administradores)
+    ---
+    tags:
+      - Administração
+    parameters:
+      - in: path
+        name: name
+        type: string
+        required: true
+    responses:
+      200:
+        description: Arquivo pstats
+      401:
+        description: Login required
+      403:
+        description: Permission denied
+      404:
+        description: Profile not found
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+    if not is_admin():
+        return jsonify({'message': 'Permission denied'}), 403
+    if not PROFILE_NAME.match(name):
+        return jsonify({'message': 'Profile not found'}), 404
+
+    return send_from_directory(current_app.config['PROFILES_DIR'], name, as_attachment=True)
@@ -0,0 +1,37 @@
+import time
+
+class PageCache:
+    """
+    Guarda, já serializados em JSON, os `size` itens mais recentes de uma listagem,
+    junto com a versão (CacheVersion) em que foram lidos. Uma página de até `size`
+    itens vira só a junção de bytes prontos. Cada item tem o cursor da página que
+    termina nele (None no último item da listagem). Entradas mais antigas que
+    `max_age` segundos são descartadas mesmo sem mudança de versão.
+    """
+
+    def __init__(self, size, max_age):
+        self.size = size
+        self.max_age = max_age
+        self._entry = None
+
+    def get(self, version, limit):
+        # Devolve (corpo, cursor da próxima página) ou None se não houver entrada válida
+        entry = self._entry
+        if entry is None or limit > self.size:
+            return None
+        entry_version, stored_at, fragments, cursors = entry
+        if entry_version != version or time.monotonic() - stored_at > self.max_age:
+            return None
+        return PageCache.render(fragments, cursors, limit)
+
+    @staticmethod
+    def render(fragments, cursors, limit):
+        cursor = cursors[:limit][-1] if cursors else None
+        return b'[' + b','.join(fragments[:limit]) + b']\n', cursor
+
+    def store(self, version, fragments, cursors):
+        # Uma única atribuição: leitores concorrentes veem a entrada antiga ou a nova
+        self._entry = (version, time.monotonic(), fragments, cursors)
+
+    def clear(self):
+        self._entry = None
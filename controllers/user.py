@@ -1,11 +1,32 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 import bcrypt
+from sqlalchemy import select
 from app import db
+from models import search
+from models.cache_version import POSTS_VERSION, CacheVersion
+from models.change import Change
+from models.feed import FeedItem
+from models.follow import Follow
+from models.post import Post
+from models.sharding import user_posts_bind
 from models.user import User
+from models.username_index import UsernameIndex
+from controllers.idempotency import idempotent
+from controllers.params import MAX_IDS, parse_ids
 
 user_bp = Blueprint('user_bp', __name__)
 
+@user_bp.record_once
+def init_username_index(state):
+    # Índice em memória dos usernames, usado por GET /users/available
+    app = state.app
+    app.extensions['username_index'] = UsernameIndex(refresh=app.config['USERNAME_INDEX_REFRESH_SECONDS'])
+
+def username_index():
+    return current_app.extensions['username_index']
+
 @user_bp.route('/users', methods=['POST'])
+@idempotent
 def create_user():
     """
     Cria um novo usuário
@@ -23,15 +44,23 @@ def create_user():
               type: string
             password:
               type: string
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
     responses:
       201:
         description: User created successfully
       400:
         description: User already exists
+      409:
+        description: Request with this Idempotency-Key in progress
+      422:
+        description: Idempotency-Key reused with a different request
     """
     data = request.get_json()
-    # Verifica se já existe um usuário com mesmo username
-    existing_user = User.query.filter_by(username=data['username']).first()
+    # Verifica se já existe um usuário com mesmo username (sem diferenciar maiúsculas)
+    existing_user = User.find_by_username(data['username'])
     if existing_user:
         return jsonify({'message': 'User already exists'}), 400
 
@@ -39,9 +68,43 @@ def create_user():
     hashed_pw = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
     new_user = User(username=data['username'], password=hashed_pw)
     db.session.add(new_user)
+    db.session.flush()
+    Change.record('user', new_user.id, 'insert')
     db.session.commit()
+    username_index().add(data['username'])
     return jsonify({'message': 'User created successfully'}), 201
 
+@user_bp.route('/users/available', methods=['GET'])
+def username_available():
+    """
+    Verifica se um username está livre (sem diferenciar maiúsculas), para o
+    formulário de cadastro. A resposta é indicativa: a criação confere de novo.
+    ---
+    tags:
+      - Usuários
+    parameters:
+      - in: query
+        name: username
+        type: string
+        required: true
+    responses:
+      200:
+        description: Disponibilidade do username
+        schema:
+          type: object
+          properties:
+            username:
+              type: string
+            available:
+              type: boolean
+      400:
+        description: Username required
+    """
+    username = request.args.get('username', '')
+    if not username:
+        return jsonify({'message': 'Username required'}), 400
+    return jsonify({'username': username, 'available': username_index().is_available(username)}), 200
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """
@@ -68,13 +131,56 @@ def get_user(user_id):
     user = User.query.get_or_404(user_id)
     return jsonify({'id': user.id, 'username': user.username, 'is_admin': user.is_admin})
 
+@user_bp.route('/users/<int:user_id>/stats', methods=['GET'])
+def get_user_stats(user_id):
+    """
+    Retorna as estatísticas de um usuário (quantidade de posts)
+    ---
+    tags:
+      - Usuários
+    parameters:
+      - in: path
+        name: user_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Estatísticas do usuário
+        schema:
+          type: object
+          properties:
+            id:
+              type: integer
+            username:
+              type: string
+            post_count:
+              type: integer
+      401:
+        description: Login required
+      404:
+        description: Usuário não encontrado
+    """
+    if 'user_id' not in session:
+        return jsonify({'message': 'Login required'}), 401
+
+    # post_count é mantido incrementalmente, sem contar os posts a cada requisição
+    user = User.query.get_or_404(user_id)
+    return jsonify({'id': user.id, 'username': user.username, 'post_count': user.post_count}), 200
+
 @user_bp.route('/users', methods=['GET'])
 def list_users():
     """
     Lista todos os usuários cadastrados (acesso permitido somente para usuários logados)
+    Com `ids` (ex.: ?ids=3,1,2) busca apenas esses usuários, numa única consulta, e
+    responde {"users": [...], "missing": [...]} na ordem pedida.
     ---
     tags:
       - Usuários
+    parameters:
+      - in: query
+        name: ids
+        type: string
+        required: false
     responses:
       200:
         description: Lista de usuários retornada com sucesso
@@ -89,16 +195,32 @@ def list_users():
                 type: string
               is_admin:
                 type: boolean
+      400:
+        description: Invalid ids
       401:
         description: Login required
     """
     if 'user_id' not in session:
         return jsonify({'message': 'Login required'}), 401
 
+    if 'ids' in request.args:
+        return get_users_by_ids(request.args['ids'])
+
     users = User.query.all()
     users_list = [{'id': user.id, 'username': user.username, 'is_admin': user.is_admin} for user in users]
     return jsonify(users_list), 200
 
+def get_users_by_ids(value):
+    user_ids = parse_ids(value)
+    if user_ids is None:
+        return jsonify({'message': f'Invalid ids (up to {MAX_IDS} comma separated integers)'}), 400
+
+    by_id = {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+    users = [by_id[user_id] for user_id in user_ids if user_id in by_id]
+    users_list = [{'id': user.id, 'username': user.username, 'is_admin': user.is_admin} for user in users]
+    missing = [user_id for user_id in user_ids if user_id not in by_id]
+    return jsonify({'users': users_list, 'missing': missing}), 200
+
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def edit_user(user_id):
     """
@@ -125,6 +247,8 @@ def edit_user(user_id):
     responses:
       200:
         description: User updated successfully
+      400:
+        description: User already exists
       401:
         description: Login required
       403:
@@ -143,13 +267,23 @@ def edit_user(user_id):
         return jsonify({'message': 'Permission denied'}), 403
 
     data = request.get_json()
+    old_username = user_to_edit.username
     if 'username' in data:
+        existing_user = User.find_by_username(data['username'])
+        if existing_user and existing_user.id != user_to_edit.id:
+            return jsonify({'message': 'User already exists'}), 400
         user_to_edit.username = data['username']
+        # O nome do autor aparece nas listagens de posts em cache
+        CacheVersion.bump(POSTS_VERSION)
     if 'password' in data:
         hashed_pw = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         user_to_edit.password = hashed_pw
 
+    Change.record('user', user_to_edit.id, 'update')
     db.session.commit()
+    if 'username' in data and data['username'] != old_username:
+        username_index().remove(old_username)
+        username_index().add(data['username'])
     return jsonify({'message': 'User updated successfully'}), 200
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -184,6 +318,26 @@ def delete_user(user_id):
     if current_user.id != user_to_delete.id and not current_user.is_admin:
         return jsonify({'message': 'Permission denied'}), 403
 
+    username = user_to_delete.username
+    Follow.remove_user(user_to_delete.id)
+    FeedItem.query.filter_by(user_id=user_to_delete.id).delete()
+    delete_user_posts(user_to_delete.id)
     db.session.delete(user_to_delete)
+    Change.record('user', user_to_delete.id, 'delete')
+    CacheVersion.bump(POSTS_VERSION)
     db.session.commit()
-    return jsonify({'message': 'User deleted successfully'}), 200
\ No newline at end of file
+    username_index().remove(username)
+    return jsonify({'message': 'User deleted successfully'}), 200
+
+def delete_user_posts(user_id):
+    # Os posts ficam no banco do autor (o shard dele, com particionamento), onde o
+    # backref User.posts não enxerga: são apagados direto lá, com índice e feeds
+    bind_arguments = user_posts_bind(user_id)
+    post_ids = db.session.execute(
+        select(Post.id).where(Post.user_id == user_id), bind_arguments=bind_arguments
+    ).scalars().all()
+    search.unindex_user_posts(user_id)
+    db.session.execute(Post.__table__.delete().where(Post.user_id == user_id), bind_arguments=bind_arguments)
+    FeedItem.query.filter_by(author_id=user_id).delete()
+    for post_id in post_ids:
+        Change.record('post', post_id, 'delete')
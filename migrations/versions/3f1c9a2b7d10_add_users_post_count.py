@@ -0,0 +1,31 @@
+"""add users.post_count
+
+Revision ID: 3f1c9a2b7d10
+Revises: 60366488e0d4
+Create Date: 2026-10-19 06:58:35.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a2b7d10'
+down_revision = '60366488e0d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Contadores iniciais a partir dos posts já existentes
+    op.execute(
+        "UPDATE users SET post_count = (SELECT COUNT(*) FROM posts WHERE posts.user_id = users.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('post_count')
@@ -0,0 +1,30 @@
+"""add post_sequences
+
+Revision ID: 5e8a0c3f92d7
+Revises: c47d2e91b5a8
+Create Date: 2026-10-19 07:23:05.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a0c3f92d7'
+down_revision = 'c47d2e91b5a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Gerador de ids dos posts em modo particionado. Os bancos dos shards são
+    # criados por create_shard_tables / reshard_posts.py, não por estas migrações.
+    op.create_table('post_sequences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+
+
+def downgrade():
+    op.drop_table('post_sequences')
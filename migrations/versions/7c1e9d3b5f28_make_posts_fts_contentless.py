@@ -0,0 +1,47 @@
+"""make posts_fts contentless
+
+Revision ID: 7c1e9d3b5f28
+Revises: b6d4e8f0a2c7
+Create Date: 2026-10-19 10:05:31.000000
+
+"""
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9d3b5f28'
+down_revision = 'b6d4e8f0a2c7'
+branch_labels = None
+depends_on = None
+
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+
+def rebuild(options):
+    # Recria o índice e o preenche no Python: textos longos podem estar
+    # comprimidos (marcador b'z' + zlib, como em models/compression.py)
+    conn = op.get_bind()
+    op.execute("DROP TABLE IF EXISTS posts_fts")
+    op.execute(f"CREATE VIRTUAL TABLE posts_fts USING fts5({options})")
+    rows = conn.execute(sa.text("SELECT id, content FROM posts")).all()
+    values = [
+        {'id': post_id, 'content': zlib.decompress(content[1:]).decode('utf-8')
+         if isinstance(content, bytes) else content}
+        for post_id, content in rows
+    ]
+    if values:
+        conn.execute(sa.text("INSERT INTO posts_fts (rowid, content) VALUES (:id, :content)"), values)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    rebuild(f"content, content='', {TOKENIZE}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    rebuild(f"content, {TOKENIZE}")
@@ -0,0 +1,69 @@
+"""add follows, feed_items and posts.fanned_out
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1c9a2b7d10
+Create Date: 2026-10-19 07:04:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f1c9a2b7d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Posts existentes não têm seguidores a quem distribuir: ficam como distribuídos
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fanned_out', sa.Boolean(), server_default='1', nullable=False))
+        batch_op.create_index('ix_posts_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_posts_pending_fanout', ['user_id', 'id'], unique=False,
+                              sqlite_where=sa.text('fanned_out = 0'))
+
+    op.create_table('follows',
+    sa.Column('follower_id', sa.Integer(), nullable=False),
+    sa.Column('followed_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['followed_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('follower_id', 'followed_id')
+    )
+    with op.batch_alter_table('follows', schema=None) as batch_op:
+        batch_op.create_index('ix_follows_followed_id', ['followed_id'], unique=False)
+
+    op.create_table('feed_items',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    with op.batch_alter_table('feed_items', schema=None) as batch_op:
+        batch_op.create_index('ix_feed_items_post_id', ['post_id'], unique=False)
+
+    # Cada autor vê os próprios posts no feed
+    op.execute("INSERT INTO feed_items (user_id, post_id, author_id) SELECT user_id, id, user_id FROM posts")
+
+
+def downgrade():
+    with op.batch_alter_table('feed_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_feed_items_post_id')
+    op.drop_table('feed_items')
+    with op.batch_alter_table('follows', schema=None) as batch_op:
+        batch_op.drop_index('ix_follows_followed_id')
+    op.drop_table('follows')
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_pending_fanout')
+        batch_op.drop_index('ix_posts_user_id')
+        batch_op.drop_column('fanned_out')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('follower_count')
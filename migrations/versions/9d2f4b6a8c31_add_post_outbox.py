@@ -0,0 +1,38 @@
+"""add post_outbox and outbox_positions
+
+Revision ID: 9d2f4b6a8c31
+Revises: 7c1e9d3b5f28
+Create Date: 2026-10-19 11:02:17.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2f4b6a8c31'
+down_revision = '7c1e9d3b5f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # post_outbox só recebe linhas nos shards (criados por create_shard_tables /
+    # reshard_posts.py); no banco principal a tabela fica vazia
+    op.create_table('post_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_table('outbox_positions',
+    sa.Column('shard', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('shard')
+    )
+
+
+def downgrade():
+    op.drop_table('outbox_positions')
+    op.drop_table('post_outbox')
@@ -0,0 +1,49 @@
+"""add changes and created_at/updated_at
+
+Revision ID: a91f6c0d4e25
+Revises: 5e8a0c3f92d7
+Create Date: 2026-10-19 07:31:52.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91f6c0d4e25'
+down_revision = '5e8a0c3f92d7'
+branch_labels = None
+depends_on = None
+
+# O SQLite só aceita ADD COLUMN NOT NULL com default constante; as linhas
+# existentes recebem a data da migração logo em seguida
+EPOCH = '1970-01-01 00:00:00.000000'
+# Mesmo formato que o SQLAlchemy grava (microssegundos), para que as datas
+# antigas e novas se comparem corretamente como texto
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+
+
+def upgrade():
+    op.create_table('changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=10), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    for table in ('users', 'posts'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=EPOCH, nullable=False))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=EPOCH, nullable=False))
+        op.execute(f"UPDATE {table} SET created_at = {NOW}, updated_at = {NOW}")
+
+
+def downgrade():
+    for table in ('posts', 'users'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('created_at')
+
+    op.drop_table('changes')
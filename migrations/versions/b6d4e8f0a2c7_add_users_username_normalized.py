@@ -0,0 +1,41 @@
+"""add users.username_normalized
+
+Revision ID: b6d4e8f0a2c7
+Revises: f3b5a7c9e1d2
+Create Date: 2026-10-19 09:12:05.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d4e8f0a2c7'
+down_revision = 'f3b5a7c9e1d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('username_normalized', sa.String(length=150), nullable=True))
+
+    # Preenchido no Python: o lower() do SQLite só converte ASCII e não coincidiria
+    # com o casefold() usado pela aplicação. Nomes que colidirem depois da
+    # normalização precisam ser renomeados antes, senão o índice único falha.
+    conn = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('username', sa.String),
+                     sa.column('username_normalized', sa.String))
+    for user_id, username in conn.execute(sa.select(users.c.id, users.c.username)).all():
+        conn.execute(users.update().where(users.c.id == user_id)
+                     .values(username_normalized=username.casefold()))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('username_normalized', existing_type=sa.String(length=150), nullable=False)
+        batch_op.create_index(batch_op.f('ix_users_username_normalized'), ['username_normalized'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_username_normalized'))
+        batch_op.drop_column('username_normalized')
@@ -0,0 +1,34 @@
+"""add posts_fts full-text index
+
+Revision ID: c47d2e91b5a8
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 07:11:40.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d2e91b5a8'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabela virtual FTS5, só no SQLite (como o DDL de models/search.py)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts "
+        "USING fts5(content, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Nesta revisão o conteúdo dos posts ainda é sempre texto puro
+    op.execute("INSERT INTO posts_fts (rowid, content) SELECT id, content FROM posts")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS posts_fts")
@@ -0,0 +1,58 @@
+"""add cache_versions and chronological indexes
+
+Revision ID: f3b5a7c9e1d2
+Revises: d28b7f4e6c13
+Create Date: 2026-10-19 07:58:44.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b5a7c9e1d2'
+down_revision = 'd28b7f4e6c13'
+branch_labels = None
+depends_on = None
+
+EPOCH = '1970-01-01 00:00:00.000000'
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.drop_index('ix_posts_pending_fanout')
+        batch_op.create_index('ix_posts_pending_fanout', ['user_id', 'created_at', 'id'], unique=False,
+                              sqlite_where=sa.text('fanned_out = 0'))
+
+    with op.batch_alter_table('feed_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=EPOCH, nullable=False))
+        batch_op.create_index('ix_feed_items_user_created', ['user_id', 'created_at', 'post_id'], unique=False)
+
+    # Data do post copiada para o feed. Com particionamento os posts estão nos
+    # shards e os itens mantêm a data EPOCH (aparecem depois dos itens novos).
+    op.execute(
+        "UPDATE feed_items SET created_at = "
+        "(SELECT posts.created_at FROM posts WHERE posts.id = feed_items.post_id) "
+        "WHERE EXISTS (SELECT 1 FROM posts WHERE posts.id = feed_items.post_id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('feed_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_feed_items_user_created')
+        batch_op.drop_column('created_at')
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_pending_fanout')
+        batch_op.create_index('ix_posts_pending_fanout', ['user_id', 'id'], unique=False,
+                              sqlite_where=sa.text('fanned_out = 0'))
+        batch_op.drop_index('ix_posts_created_at_id')
+
+    op.drop_table('cache_versions')
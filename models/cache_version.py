@@ -0,0 +1,28 @@
+from sqlalchemy import insert, select, update
+from models import db
+
+# Versão dos dados exibidos na listagem de posts (posts e nomes dos autores)
+POSTS_VERSION = 'posts'
+
+class CacheVersion(db.Model):
+    # Carimbo de versão compartilhado entre processos: quem altera os dados incrementa
+    # a versão na mesma transação, e os caches locais comparam antes de responder
+    __tablename__ = 'cache_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def current(name):
+        return db.session.execute(
+            select(CacheVersion.version).where(CacheVersion.name == name)
+        ).scalar() or 0
+
+    @staticmethod
+    def bump(name):
+        result = db.session.execute(
+            update(CacheVersion).where(CacheVersion.name == name)
+            .values(version=CacheVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(CacheVersion).values(name=name, version=1))
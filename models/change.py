@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+from models import db
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+class Change(db.Model):
+    # Log de alterações para sincronização incremental. O id é o cursor entregue
+    # aos clientes: GET /changes?since=<id> lê um range da chave primária.
+    __tablename__ = 'changes'
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(10), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    # insert, update ou delete (tombstone)
+    op = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    @staticmethod
+    def record(entity, entity_id, op):
+        db.session.add(Change(entity=entity, entity_id=entity_id, op=op))
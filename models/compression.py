@@ -0,0 +1,69 @@
+import zlib
+from flask import current_app, has_app_context
+from sqlalchemy import func
+from sqlalchemy.types import Text, TypeDecorator
+
+# Textos longos são gravados comprimidos: um marcador de 1 byte seguido do fluxo
+# zlib, num valor BLOB. Textos curtos continuam como TEXT, sem custo nenhum na
+# leitura. A coluna continua declarada como TEXT: o SQLite guarda cada valor com o
+# seu próprio tipo, então linhas antigas e novas convivem sem migração de esquema.
+ZLIB_MARKER = b'z'
+DEFAULT_THRESHOLD = 1024
+
+def compression_threshold():
+    if has_app_context():
+        return current_app.config['POST_COMPRESS_THRESHOLD']
+    return DEFAULT_THRESHOLD
+
+def compress_text(value, threshold):
+    # Devolve o valor a gravar: o próprio texto ou o marcador + zlib, se compensar
+    if value is None or threshold <= 0:
+        return value
+    raw = value.encode('utf-8')
+    if len(raw) < threshold:
+        return value
+    compressed = ZLIB_MARKER + zlib.compress(raw)
+    return compressed if len(compressed) < len(raw) else value
+
+def decompress_text(value):
+    if not isinstance(value, bytes):
+        return value
+    if value[:1] != ZLIB_MARKER:
+        raise ValueError(f"Unknown content encoding: {value[:1]!r}")
+    return zlib.decompress(value[1:]).decode('utf-8')
+
+class CompressedText(TypeDecorator):
+    """Texto comprimido com zlib a partir de POST_COMPRESS_THRESHOLD bytes (só no SQLite)."""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name != 'sqlite':
+            return value
+        return compress_text(value, compression_threshold())
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+def preview_bytes(length):
+    # Prefixo do valor gravado suficiente para `length` caracteres: até 4 bytes por
+    # caractere em UTF-8, com folga para o cabeçalho do bloco comprimido
+    return 4 * length + 64
+
+def preview_column(column, length):
+    # substr corta TEXT por caracteres e BLOB por bytes; o resultado não passa pelo
+    # CompressedText, então o prefixo chega cru para preview_text
+    return func.substr(column, 1, preview_bytes(length))
+
+def preview_text(value, length):
+    """
+    Devolve (prévia, truncado) a partir do prefixo lido por preview_column, sem
+    descomprimir o texto inteiro: o zlib para ao produzir bytes suficientes.
+    """
+    if not isinstance(value, bytes):
+        return value[:length], len(value) > length
+    decompressor = zlib.decompressobj()
+    data = decompressor.decompress(value[1:], preview_bytes(length))
+    # Um caractere cortado no fim do prefixo é descartado
+    text = data.decode('utf-8', errors='ignore')
+    return text[:length], len(text) > length or not decompressor.eof
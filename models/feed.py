@@ -0,0 +1,64 @@
+from flask import current_app
+from sqlalchemy import insert, literal, select, true
+from models import db
+from models.follow import Follow
+from models.post import Post
+from models.sharding import user_posts_bind
+
+class FeedItem(db.Model):
+    # Timeline materializada: uma linha por (dono do feed, post), com a data de
+    # criação do post copiada, para ler o feed como um único range no índice
+    # (user_id, created_at, post_id).
+    __tablename__ = 'feed_items'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    # Sem FK para posts: com particionamento os posts ficam em outros bancos
+    post_id = db.Column(db.Integer, primary_key=True, index=True)
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_feed_items_user_created', 'user_id', 'created_at', 'post_id'),
+    )
+
+    @staticmethod
+    def is_fanout_author(author):
+        # Autores com muitos seguidores não recebem fan-out na escrita; seus posts
+        # ficam com fanned_out = False e são lidos no momento da consulta do feed
+        return author.follower_count <= current_app.config['FEED_FANOUT_LIMIT']
+
+    @staticmethod
+    def fan_out(post, author):
+        # O próprio autor sempre vê seus posts no feed
+        db.session.add(FeedItem(user_id=author.id, post_id=post.id, author_id=author.id, created_at=post.created_at))
+        if not post.fanned_out:
+            return
+        # INSERT ... SELECT: uma única instrução para todos os seguidores. Com
+        # particionamento o fan-out é aplicado depois do post gravado, e quem
+        # começou a seguir nesse meio-tempo já recebeu o post pelo backfill.
+        received = select(FeedItem.post_id).where(
+            FeedItem.user_id == Follow.follower_id, FeedItem.post_id == post.id
+        )
+        followers = select(
+            Follow.follower_id, literal(post.id), literal(author.id),
+            literal(post.created_at, FeedItem.created_at.type)
+        ).where(Follow.followed_id == author.id, ~received.exists())
+        db.session.execute(
+            insert(FeedItem).from_select(['user_id', 'post_id', 'author_id', 'created_at'], followers)
+        )
+
+    @staticmethod
+    def backfill(user_id, author):
+        # Ao seguir alguém, traz os posts mais recentes dele para o feed. Só os
+        # distribuídos na escrita: os demais já são lidos na consulta do feed.
+        # Os posts podem estar em outro banco (shard), então os ids são lidos antes
+        recent = db.session.execute(
+            select(Post.id, Post.created_at).where(Post.user_id == author.id, Post.fanned_out == true())
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(current_app.config['FEED_BACKFILL']),
+            bind_arguments=user_posts_bind(author.id)
+        ).all()
+        if recent:
+            db.session.execute(FeedItem.__table__.insert(), [
+                {'user_id': user_id, 'post_id': post_id, 'author_id': author.id, 'created_at': created_at}
+                for post_id, created_at in recent
+            ])
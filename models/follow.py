@@ -0,0 +1,20 @@
+from models import db
+
+class Follow(db.Model):
+    __tablename__ = 'follows'
+    follower_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    followed_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, index=True)
+
+    @staticmethod
+    def remove_user(user_id):
+        # Remove as relações de um usuário que será deletado, mantendo os
+        # contadores de seguidores de quem ele seguia consistentes
+        from models.user import User
+        followed_ids = [f.followed_id for f in Follow.query.filter_by(follower_id=user_id)]
+        if followed_ids:
+            User.query.filter(User.id.in_(followed_ids)).update(
+                {User.follower_count: User.follower_count - 1}
+            )
+        Follow.query.filter(
+            (Follow.follower_id == user_id) | (Follow.followed_id == user_id)
+        ).delete()
@@ -0,0 +1,10 @@
+from models import db
+
+class IdempotencyKey(db.Model):
+    # Primeira resposta de cada Idempotency-Key (status nulo = requisição em andamento)
+    __tablename__ = 'idempotency_keys'
+    key = db.Column(db.String(300), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.Integer)
+    body = db.Column(db.LargeBinary)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+from models import db
+from models.cache_version import POSTS_VERSION, CacheVersion
+from models.change import Change
+from models.feed import FeedItem
+from models.post import Post
+from models.user import User
+
+class PostOutbox(db.Model):
+    # Pendências de um post no banco principal (contador, feed, log de alterações e
+    # versão do cache), gravadas no shard do autor na mesma transação do post. O
+    # AUTOINCREMENT garante ids sempre crescentes, mesmo depois da limpeza.
+    __tablename__ = 'post_outbox'
+    __table_args__ = {'sqlite_autoincrement': True}
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+
+class OutboxPosition(db.Model):
+    # Última pendência aplicada de cada shard. Avança na mesma transação em que as
+    # pendências são aplicadas no banco principal: cada uma é aplicada uma única vez.
+    __tablename__ = 'outbox_positions'
+    shard = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def lock(shard):
+        # Começa pela escrita: a trava do SQLite impede que dois processos leiam a
+        # mesma posição e apliquem as mesmas pendências
+        result = db.session.execute(
+            update(OutboxPosition).where(OutboxPosition.shard == shard)
+            .values(last_id=OutboxPosition.last_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(OutboxPosition).values(shard=shard, last_id=0))
+        return db.session.execute(
+            select(OutboxPosition.last_id).where(OutboxPosition.shard == shard)
+        ).scalar()
+
+def apply_pending(shard, limit, cleanup=True):
+    """
+    Aplica no banco principal até `limit` pendências do shard e devolve quantas
+    foram aplicadas. Posts apagados antes disso só contam no contador, que a
+    deleção já decrementou. Com `cleanup` as pendências aplicadas saem do shard.
+    """
+    bind_arguments = {'bind': db.engines[shard]}
+    last_id = OutboxPosition.lock(shard)
+    rows = db.session.execute(
+        select(PostOutbox.id.label('outbox_id'), PostOutbox.user_id, Post.id, Post.created_at, Post.fanned_out)
+        .outerjoin(Post, Post.id == PostOutbox.post_id)
+        .where(PostOutbox.id > last_id).order_by(PostOutbox.id).limit(limit),
+        bind_arguments=bind_arguments
+    ).all()
+    if rows:
+        apply_rows(shard, rows)
+        last_id = rows[-1].outbox_id
+    else:
+        db.session.rollback()
+    if cleanup and last_id:
+        remove_applied(shard, last_id)
+    return len(rows)
+
+def apply_rows(shard, rows):
+    for user_id, count in Counter(row.user_id for row in rows).items():
+        User.adjust_post_count(user_id, count)
+    authors = {user.id: user for user in User.query.filter(User.id.in_({row.user_id for row in rows}))}
+    for row in rows:
+        if row.id is None or row.user_id not in authors:
+            continue
+        FeedItem.fan_out(row, authors[row.user_id])
+        Change.record('post', row.id, 'insert')
+    CacheVersion.bump(POSTS_VERSION)
+    db.session.execute(
+        update(OutboxPosition).where(OutboxPosition.shard == shard).values(last_id=rows[-1].outbox_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def remove_applied(shard, last_id):
+    # Limpeza no shard: se falhar, as linhas ficam abaixo da posição e são ignoradas
+    db.session.execute(
+        delete(PostOutbox).where(PostOutbox.id <= last_id), bind_arguments={'bind': db.engines[shard]}
+    )
+    db.session.commit()
+
+def apply_all_pending(cleanup=True):
+    # Esvazia as pendências de todos os shards (usado pela thread e por scripts)
+    limit = current_app.config['POST_OUTBOX_BATCH']
+    applied = 0
+    for shard in current_app.config['POST_SHARDS']:
+        while True:
+            count = apply_pending(shard, limit, cleanup)
+            applied += count
+            if count < limit:
+                break
+    return applied
+
+class OutboxApplier:
+    """
+    Thread que aplica as pendências dos shards no banco principal. Acorda a cada
+    post gravado (notify) e a cada `interval` segundos, para retomar pendências
+    deixadas por falhas ou por outros processos. Entre duas passadas espera
+    `window` segundos: os posts gravados nesse meio-tempo viram uma única
+    transação no banco principal, fora do caminho da requisição. As pendências
+    aplicadas saem dos shards no máximo uma vez a cada `interval` segundos.
+    """
+
+    def __init__(self, app, interval, window):
+        self.app = app
+        self.interval = interval
+        self.window = window
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self):
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='outbox-applier', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        cleaned_at = 0
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            cleanup = time.monotonic() - cleaned_at >= self.interval
+            try:
+                with self.app.app_context():
+                    apply_all_pending(cleanup)
+                if cleanup:
+                    cleaned_at = time.monotonic()
+            except Exception:
+                # As pendências continuam no shard e são aplicadas na próxima passada
+                self.app.logger.exception('Falha ao aplicar pendências dos shards')
+            time.sleep(self.window)
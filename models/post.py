@@ -1,9 +1,62 @@
+from flask import abort
+from sqlalchemy import select
 from models import db
+from models.change import utcnow
+from models.compression import CompressedText
 
 class Post(db.Model):
     __tablename__ = 'posts'
     id = db.Column(db.Integer, primary_key=True)
-    content = db.Column(db.Text, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    content = db.Column(CompressedText, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    # Se o post foi distribuído nos feeds dos seguidores na escrita; os que não foram
+    # (autor acima de FEED_FANOUT_LIMIT naquele momento) são lidos na consulta do feed
+    fanned_out = db.Column(db.Boolean, nullable=False, default=True, server_default='1')
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
     user = db.relationship('User', backref='posts')
+
+    __table_args__ = (
+        # Ordem cronológica (com o id como desempate): os ids não seguem a data
+        # de criação entre shards, porque carregam a sequência de cada shard
+        db.Index('ix_posts_created_at_id', 'created_at', 'id'),
+        # Posts que o feed precisa buscar na leitura, por autor
+        db.Index('ix_posts_pending_fanout', 'user_id', 'created_at', 'id', sqlite_where=db.text('fanned_out = 0')),
+    )
+
+    @staticmethod
+    def get_or_404(post_id):
+        # Busca pelo id no shard certo (o id carrega o bucket do autor)
+        from models.sharding import post_bind
+        post = db.session.get(Post, post_id, bind_arguments=post_bind(post_id))
+        if post is None:
+            abort(404)
+        return post
+
+    @staticmethod
+    def load_many(post_ids):
+        # Carrega vários posts com seus autores, na ordem pedida (ids inexistentes
+        # são ignorados). Sem particionamento é uma única consulta com JOIN.
+        from models.sharding import group_by_shard, is_sharded
+        from models.user import User
+        if not post_ids:
+            return []
+        if not is_sharded():
+            rows = db.session.query(Post, User).join(User, User.id == Post.user_id).filter(
+                Post.id.in_(post_ids)
+            ).all()
+        else:
+            # Posts e usuários estão em bancos diferentes: um IN por shard e um para os autores
+            posts = []
+            for bind_arguments, ids in group_by_shard(post_ids):
+                posts.extend(db.session.execute(
+                    select(Post).where(Post.id.in_(ids)), bind_arguments=bind_arguments
+                ).scalars())
+            authors = {
+                user.id: user
+                for user in User.query.filter(User.id.in_({post.user_id for post in posts}))
+            }
+            rows = [(post, authors[post.user_id]) for post in posts if post.user_id in authors]
+        by_id = {post.id: (post, author) for post, author in rows}
+        return [by_id[post_id] for post_id in post_ids if post_id in by_id]
@@ -0,0 +1,64 @@
+import random
+import time
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_PREFIX = 'replica_'
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+class RoutingSession(Session):
+    """
+    Sessão que envia as leituras para a réplica escolhida para a requisição
+    (g.db_replica). Escritas e flushes continuam sempre no banco principal,
+    exceto os posts, que em modo particionado são gravados no shard do autor.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        if has_app_context() and current_app.config.get('POST_SHARDS'):
+            self.connection_callable = self._shard_connection
+
+    def _shard_connection(self, mapper=None, instance=None, **kwargs):
+        # Chamado pelo flush para cada objeto: posts vão para o shard do autor
+        from models.sharding import SHARDED_TABLES, shard_key
+        if instance is not None and mapper.local_table.name in SHARDED_TABLES:
+            engine = self._db.engines[shard_key(instance.user_id)]
+            return self.connection(bind_arguments={'bind': engine})
+        return self.connection(bind_arguments={'mapper': mapper})
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            replica = g.get('db_replica')
+            if replica and not self._flushing and not isinstance(clause, UpdateBase):
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def replica_binds(uris):
+    # DATABASE_REPLICA_URIS="sqlite:///r1.db,sqlite:///r2.db" -> binds replica_0, replica_1
+    uris = [uri.strip() for uri in uris.split(',') if uri.strip()]
+    return {f'{REPLICA_PREFIX}{i}': uri for i, uri in enumerate(uris)}
+
+def init_read_replicas(app):
+    replicas = sorted(
+        key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith(REPLICA_PREFIX)
+    )
+    app.config['DATABASE_REPLICAS'] = replicas
+    if not replicas:
+        return
+
+    @app.before_request
+    def choose_replica():
+        if request.method not in READ_ONLY_METHODS:
+            return
+        # Read-your-writes: logo após uma escrita do próprio cliente, lê do principal
+        last_write = session.get('last_write_at')
+        if last_write and time.time() - last_write < current_app.config['REPLICA_STICKY_SECONDS']:
+            return
+        g.db_replica = random.choice(replicas)
+
+    @app.after_request
+    def remember_write(response):
+        if request.method not in READ_ONLY_METHODS and response.status_code < 400:
+            session['last_write_at'] = time.time()
+        return response
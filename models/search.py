@@ -0,0 +1,106 @@
+import heapq
+from itertools import islice
+from sqlalchemy import DDL, event, select, text
+from models import db
+from models.post import Post
+from models.sharding import post_binds, user_posts_bind
+
+# Índice de texto completo dos posts (rowid = id do post), sincronizado pelos
+# endpoints de escrita. A tabela FTS5 é contentless (content=''): guarda só os
+# termos, sem uma segunda cópia do texto, que na tabela de posts pode estar
+# comprimido. Em troca, remover um post do índice exige o texto indexado.
+FTS_TABLE = 'posts_fts'
+FTS_OPTIONS = "content, content='', tokenize = 'unicode61 remove_diacritics 2'"
+
+event.listen(
+    db.metadata, 'after_create',
+    DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({FTS_OPTIONS})"
+    ).execute_if(dialect='sqlite')
+)
+event.listen(
+    db.metadata, 'before_drop',
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect='sqlite')
+)
+
+def is_enabled():
+    return db.engine.dialect.name == 'sqlite'
+
+def build_match_query(q):
+    # Cada termo vira uma frase entre aspas, evitando que a entrada do usuário
+    # seja interpretada como sintaxe do FTS5 (AND, NEAR, *, etc.)
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    return ' '.join(terms)
+
+INSERT_STATEMENT = text(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (:id, :content)")
+# Numa tabela contentless o DELETE não funciona: o comando 'delete' recebe o
+# texto que foi indexado para saber quais termos retirar
+DELETE_STATEMENT = text(
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, content) VALUES ('delete', :id, :content)"
+)
+
+def index_post(post):
+    # Indexa um post novo
+    if not is_enabled():
+        return
+    db.session.execute(
+        INSERT_STATEMENT, {'id': post.id, 'content': post.content},
+        bind_arguments=user_posts_bind(post.user_id)
+    )
+
+def unindex_post(post, content=None):
+    # `content` é o texto indexado, se o post já foi alterado (padrão: post.content)
+    if not is_enabled():
+        return
+    db.session.execute(
+        DELETE_STATEMENT, {'id': post.id, 'content': post.content if content is None else content},
+        bind_arguments=user_posts_bind(post.user_id)
+    )
+
+def reindex_post(post, old_content):
+    unindex_post(post, old_content)
+    index_post(post)
+
+def unindex_user_posts(user_id):
+    # Remove do índice todos os posts de um autor (antes de apagá-los do shard)
+    if not is_enabled():
+        return
+    bind_arguments = user_posts_bind(user_id)
+    rows = db.session.execute(
+        select(Post.id, Post.content).where(Post.user_id == user_id), bind_arguments=bind_arguments
+    ).all()
+    if rows:
+        db.session.execute(DELETE_STATEMENT, [row._asdict() for row in rows], bind_arguments=bind_arguments)
+
+def search_post_ids(q, limit, offset=0):
+    # Ids dos posts que casam com a busca, do mais relevante (bm25) ao menos relevante.
+    # Com particionamento cada shard devolve seus melhores resultados e eles são intercalados.
+    params = {'q': build_match_query(q), 'limit': limit + offset}
+    results = [
+        db.session.execute(
+            text(
+                f"SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH :q ORDER BY score LIMIT :limit"
+            ),
+            params, bind_arguments=bind_arguments
+        ).all()
+        for bind_arguments in post_binds()
+    ]
+    ranked = heapq.merge(*results, key=lambda row: row.score)
+    return [row.rowid for row in islice(ranked, offset, offset + limit)]
+
+def rebuild_index():
+    # A tabela é recriada, o que também converte índices antigos (com cópia do
+    # texto) nos shards, que não passam pelas migrações. O texto passa pelo
+    # Python: posts longos estão comprimidos na tabela de posts.
+    for bind_arguments in post_binds():
+        db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"), bind_arguments=bind_arguments)
+        db.session.execute(
+            text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({FTS_OPTIONS})"), bind_arguments=bind_arguments
+        )
+        rows = db.session.execute(
+            select(Post.id, Post.content).execution_options(yield_per=1000),
+            bind_arguments=bind_arguments
+        )
+        for batch in rows.partitions():
+            db.session.execute(INSERT_STATEMENT, [row._asdict() for row in batch], bind_arguments=bind_arguments)
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import event
+from models import db
+from models.post import Post
+
+# Particionamento horizontal dos posts por autor. Com POST_SHARD_URIS configurado,
+# cada post vive no banco do seu autor: shard = bucket(user_id) % N, onde o bucket
+# são os 16 bits menos significativos do id do usuário.
+#
+# Os ids de posts em modo particionado carregam o bucket do autor nos bits baixos
+# (id = sequência << 16 | bucket), então qualquer id leva direto ao shard certo,
+# para qualquer quantidade de shards, sem tabela de diretório.
+SHARD_PREFIX = 'posts_shard_'
+SHARDED_TABLES = ('posts', 'post_sequences', 'posts_fts', 'post_outbox')
+BUCKET_BITS = 16
+BUCKET_MASK = (1 << BUCKET_BITS) - 1
+
+class PostSequence(db.Model):
+    # Gerador de sequência por shard: o AUTOINCREMENT do SQLite é atômico dentro
+    # da transação de escrita, então dois inserts nunca recebem o mesmo número
+    __tablename__ = 'post_sequences'
+    __table_args__ = {'sqlite_autoincrement': True}
+    id = db.Column(db.Integer, primary_key=True)
+
+def shard_binds(uris):
+    # POST_SHARD_URIS="sqlite:///posts_0.db,sqlite:///posts_1.db" -> posts_shard_0, posts_shard_1
+    uris = [uri.strip() for uri in uris.split(',') if uri.strip()]
+    return {f'{SHARD_PREFIX}{i}': uri for i, uri in enumerate(uris)}
+
+def init_shards(app):
+    app.config['POST_SHARDS'] = sorted(
+        (key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith(SHARD_PREFIX)),
+        key=lambda key: int(key[len(SHARD_PREFIX):])
+    )
+
+def is_sharded():
+    return bool(current_app.config['POST_SHARDS'])
+
+def shard_key(bucket, keys=None):
+    keys = keys or current_app.config['POST_SHARDS']
+    return keys[(bucket & BUCKET_MASK) % len(keys)]
+
+def make_post_id(sequence, user_id):
+    return (sequence << BUCKET_BITS) | (user_id & BUCKET_MASK)
+
+def user_posts_bind(user_id):
+    # bind_arguments para consultas de posts de um usuário ({} = roteamento padrão)
+    if not is_sharded():
+        return {}
+    return {'bind': db.engines[shard_key(user_id)]}
+
+def post_bind(post_id):
+    if not is_sharded():
+        return {}
+    return {'bind': db.engines[shard_key(post_id)]}
+
+def post_binds():
+    # Um bind_arguments por shard (ou um único, vazio, sem particionamento)
+    if not is_sharded():
+        return [{}]
+    return [{'bind': db.engines[key]} for key in current_app.config['POST_SHARDS']]
+
+def post_engines():
+    if not is_sharded():
+        return [db.engine]
+    return [db.engines[key] for key in current_app.config['POST_SHARDS']]
+
+def group_by_shard(ids):
+    # Agrupa ids de posts ou de usuários (ambos levam ao shard pelo bucket) por shard
+    groups = {}
+    for id_ in ids:
+        key = shard_key(id_) if is_sharded() else None
+        groups.setdefault(key, []).append(id_)
+    return [
+        ({'bind': db.engines[key]} if key else {}, ids)
+        for key, ids in groups.items()
+    ]
+
+def scan_shards(statement):
+    # Executa a mesma consulta em todos os shards, em paralelo, devolvendo uma
+    # lista de resultados por shard (para serem intercalados por quem chamou)
+    if not is_sharded():
+        return [db.session.execute(statement).all()]
+    engines = post_engines()
+
+    def run(engine):
+        with engine.connect() as conn:
+            return conn.execute(statement).all()
+
+    with ThreadPoolExecutor(max_workers=len(engines)) as executor:
+        return list(executor.map(run, engines))
+
+def create_shard_tables(engines=None):
+    tables = [db.metadata.tables[name] for name in SHARDED_TABLES if name in db.metadata.tables]
+    for engine in engines or post_engines():
+        db.metadata.create_all(engine, tables=tables)
+
+def next_sequence(connection):
+    # O AUTOINCREMENT guarda o maior valor em sqlite_sequence, então a linha pode
+    # ser apagada em seguida e a tabela continua vazia
+    sequence = connection.execute(PostSequence.__table__.insert()).inserted_primary_key[0]
+    connection.execute(PostSequence.__table__.delete().where(PostSequence.id == sequence))
+    return sequence
+
+def reserve_sequence(connection, minimum):
+    # Garante que as próximas sequências do shard sejam maiores que `minimum`
+    connection.execute(PostSequence.__table__.insert().prefix_with('OR IGNORE'), {'id': minimum})
+    connection.execute(PostSequence.__table__.delete().where(PostSequence.id == minimum))
+
+@event.listens_for(Post, 'before_insert')
+def assign_post_id(mapper, connection, target):
+    # Em modo particionado o id é gerado no próprio shard, na mesma transação do insert
+    if target.id is None and is_sharded():
+        target.id = make_post_id(next_sequence(connection), target.user_id)
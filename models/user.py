@@ -1,13 +1,44 @@
+from sqlalchemy.orm import validates
 from models import db
+from models.change import utcnow
+
+def normalize_username(username):
+    # Forma usada para comparar usernames sem diferenciar maiúsculas; casefold
+    # cobre também letras fora do ASCII (o lower() do SQLite não)
+    return username.casefold()
 
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
+    # Preenchido a partir de username; o casefold pode aumentar o texto (ß -> ss)
+    username_normalized = db.Column(db.String(150), unique=True, index=True, nullable=False)
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
+    # Contador desnormalizado de posts, mantido em create_post/delete_post
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Quantidade de seguidores, usada para decidir entre fan-out na escrita ou na leitura
+    follower_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
     def __init__(self, username, password, is_admin=False):
         self.username = username
         self.password = password
         self.is_admin = is_admin
+
+    @validates('username')
+    def validate_username(self, key, username):
+        self.username_normalized = normalize_username(username)
+        return username
+
+    @staticmethod
+    def find_by_username(username):
+        # Busca sem diferenciar maiúsculas, pelo índice único de username_normalized
+        return User.query.filter_by(username_normalized=normalize_username(username)).first()
+
+    @staticmethod
+    def adjust_post_count(user_id, delta):
+        # Incremento atômico no banco (UPDATE ... SET post_count = post_count + delta),
+        # sem carregar o usuário e sem condição de corrida entre requisições
+        User.query.filter_by(id=user_id).update({User.post_count: User.post_count + delta})
@@ -0,0 +1,91 @@
+import hashlib
+import math
+import threading
+import time
+from models import db
+from models.user import User, normalize_username
+
+class BloomFilter:
+    """
+    Conjunto aproximado: um nome adicionado sempre está `in` o filtro; um nome
+    nunca adicionado aparece como presente (falso positivo) com probabilidade
+    ~`error_rate` enquanto houver até `capacity` nomes. Não permite remoção.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: k posições a partir de dois hashes de 64 bits
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+class UsernameIndex:
+    """
+    Índice em memória dos usernames em uso (normalizados com normalize_username), para
+    responder à verificação de disponibilidade sem ir ao banco. O filtro de Bloom
+    descarta os nomes livres; o conjunto exato separa os falsos positivos e guarda
+    os nomes para reconstruir o filtro (que não aceita remoções). Só a resposta
+    "em uso" é confirmada no banco, já que outro processo pode ter liberado o nome.
+    O índice é carregado no primeiro uso e recarregado a cada `refresh` segundos
+    (0 desativa), para acompanhar alterações feitas por outros processos.
+    """
+
+    def __init__(self, refresh=0, error_rate=0.01):
+        self.refresh = refresh
+        self.error_rate = error_rate
+        self._names = set()
+        self._bloom = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        names = {name for (name,) in db.session.query(User.username_normalized)}
+        with self._lock:
+            self._names = names
+            self._rebuild()
+            self._loaded_at = time.monotonic()
+
+    def _rebuild(self):
+        # Folga para crescer; passando da capacidade o filtro é refeito a partir do conjunto
+        self._bloom = BloomFilter(max(1024, 2 * len(self._names)), self.error_rate)
+        for name in self._names:
+            self._bloom.add(name)
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or (self.refresh and time.monotonic() - self._loaded_at > self.refresh):
+            self.load()
+
+    def add(self, username):
+        self._ensure_loaded()
+        name = normalize_username(username)
+        with self._lock:
+            self._names.add(name)
+            if len(self._names) > self._bloom.capacity:
+                self._rebuild()
+            else:
+                self._bloom.add(name)
+
+    def remove(self, username):
+        self._ensure_loaded()
+        with self._lock:
+            self._names.discard(normalize_username(username))
+
+    def is_available(self, username):
+        self._ensure_loaded()
+        name = normalize_username(username)
+        if name not in self._bloom or name not in self._names:
+            return True
+        # Positivo: o banco tem a palavra final
+        return User.find_by_username(username) is None
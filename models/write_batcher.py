@@ -0,0 +1,82 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from models import db
+
+class WriteBatcher:
+    """
+    Agrupa escritas de várias requisições numa única transação (group commit).
+    Cada requisição entrega seu item e espera; uma thread escritora junta até
+    `max_size` itens ou até `window` segundos após o primeiro, grava todos com
+    `persist(items)` e faz um único commit. A requisição só recebe a resposta
+    depois que o commit do seu lote terminou, ou desiste após `timeout` segundos.
+    """
+
+    def __init__(self, app, persist, max_size, window, timeout):
+        self.app = app
+        self.persist = persist
+        self.max_size = max_size
+        self.window = window
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        """
+        Bloqueia até o lote do item ser gravado e devolve o resultado de persist
+        para o item. Levanta TimeoutError se a gravação passar de `timeout`: o
+        item pode ainda ser gravado depois.
+        """
+        future = Future()
+        self._ensure_started()
+        self._queue.put((item, future))
+        return future.result(timeout=self.timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            # Recria a thread se ela tiver morrido, em vez de deixar a fila sem leitor
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    # Mesmo sem janela, aproveita o que chegou enquanto o último commit rodava
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as error:
+                # Falha fora do persist (rollback, fim do contexto): responde quem
+                # ainda espera e continua atendendo a fila
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _write(self, batch):
+        failure = None
+        with self.app.app_context():
+            try:
+                results = self.persist([item for item, _ in batch])
+                db.session.commit()
+            except Exception as error:
+                db.session.rollback()
+                failure = error
+
+        if failure is None:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        elif len(batch) > 1:
+            # Um item inválido não derruba o lote: grava cada um separadamente
+            for entry in batch:
+                self._write([entry])
+        else:
+            batch[0][1].set_exception(failure)
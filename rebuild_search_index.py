@@ -0,0 +1,19 @@
+from sqlalchemy import func, select
+from app import create_app
+from models import db, search
+from models.post import Post
+from models.sharding import create_shard_tables, scan_shards
+
+app = create_app()
+
+with app.app_context():
+    if not search.is_enabled():
+        print("Busca textual (FTS5) disponível apenas com SQLite")
+    else:
+        # Garante que a tabela virtual existe em bancos criados antes da busca
+        db.create_all()
+        create_shard_tables()
+        search.rebuild_index()
+        db.session.commit()
+        total = sum(rows[0][0] for rows in scan_shards(select(func.count(Post.id))))
+        print(f"Índice de busca reconstruído ({total} post(s))")
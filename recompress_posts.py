@@ -0,0 +1,43 @@
+# Regrava o conteúdo dos posts conforme o POST_COMPRESS_THRESHOLD atual: comprime
+# textos longos gravados antes da compressão (ou com outro limite) e descomprime os
+# que ficaram abaixo do limite. Datas de edição, feed e log de alterações não mudam.
+# Uso: python recompress_posts.py [--vacuum]
+import sys
+from sqlalchemy import cast, func, select, type_coerce
+from app import create_app
+from models import db
+from models.compression import compress_text, compression_threshold, decompress_text
+from models.post import Post
+from models.sharding import post_engines
+
+def recompress(engine, threshold):
+    # Lê o valor gravado sem passar pelo CompressedText para comparar com o novo
+    stored = type_coerce(Post.content, db.Text)
+    total_bytes = select(func.coalesce(func.sum(func.length(cast(stored, db.LargeBinary))), 0))
+    changed = 0
+    with engine.begin() as conn:
+        before = conn.execute(total_bytes).scalar()
+        for row in conn.execute(select(Post.id, stored.label('content'))).all():
+            text = decompress_text(row.content)
+            value = compress_text(text, threshold)
+            if value != row.content:
+                # Sem o updated_at explícito o Core aplicaria o onupdate; o texto não mudou
+                conn.execute(
+                    Post.__table__.update().where(Post.id == row.id)
+                    .values(content=text, updated_at=Post.updated_at)
+                )
+                changed += 1
+        after = conn.execute(total_bytes).scalar()
+    return changed, before, after
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        threshold = compression_threshold()
+        for engine in post_engines():
+            changed, before, after = recompress(engine, threshold)
+            print(f"{engine.url}: {changed} post(s) regravado(s), {before} -> {after} bytes")
+            if '--vacuum' in sys.argv:
+                # O arquivo só diminui depois do VACUUM (fora de transação)
+                with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                    conn.exec_driver_sql('VACUUM')
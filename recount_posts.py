@@ -0,0 +1,29 @@
+from collections import Counter
+from sqlalchemy import func, select
+from app import create_app
+from models import db
+from models.outbox import apply_all_pending
+from models.post import Post
+from models.sharding import is_sharded, scan_shards
+from models.user import User
+
+app = create_app()
+
+with app.app_context():
+    # Com particionamento, posts ainda não contados entram antes da contagem
+    if is_sharded():
+        apply_all_pending()
+    # Uma única consulta agrupada (por shard) com a quantidade real de posts por usuário
+    counts = Counter()
+    statement = select(Post.user_id, func.count(Post.id)).group_by(Post.user_id)
+    for rows in scan_shards(statement):
+        counts.update(dict(rows))
+
+    fixed = 0
+    for user in User.query.all():
+        expected = counts.get(user.id, 0)
+        if user.post_count != expected:
+            user.post_count = expected
+            fixed += 1
+    db.session.commit()
+    print(f"Contadores de posts recalculados ({fixed} usuário(s) corrigido(s))")
@@ -0,0 +1,106 @@
+# Move os posts da configuração atual (POST_SHARD_URIS, ou o banco principal se
+# vazio) para uma nova lista de shards.
+# Uso: python reshard_posts.py "sqlite:///posts_0.db,sqlite:///posts_1.db,sqlite:///posts_2.db"
+# Depois de rodar, configure POST_SHARD_URIS com a nova lista.
+import os
+import sys
+from contextlib import ExitStack
+from sqlalchemy import func, select
+from app import create_app
+from models import db, search
+from models.change import Change
+from models.feed import FeedItem
+from models.outbox import OutboxPosition, apply_all_pending
+from models.post import Post
+from models.sharding import (
+    BUCKET_BITS, BUCKET_MASK, create_shard_tables, is_sharded, make_post_id, next_sequence,
+    post_engines, reserve_sequence, shard_binds
+)
+
+TARGET_PREFIX = 'reshard_target_'
+
+def has_shard_id(post_id, user_id):
+    # Ids vindos do banco sem particionamento (autoincremento) não carregam o bucket do autor
+    return (post_id & BUCKET_MASK) == (user_id & BUCKET_MASK)
+
+def reshard(targets):
+    """
+    Redistribui os posts entre os engines `targets`. Posts cujo id já carrega o
+    bucket do autor mantêm o id; os demais recebem um id novo, e o feed materializado
+    e o log de alterações são atualizados. Cada banco é alterado numa transação própria.
+    """
+    sources = post_engines()
+    if is_sharded():
+        # Pendências aplicadas antes: o log de pendências de cada shard fica vazio
+        apply_all_pending()
+    create_shard_tables(targets)
+    moved = remapped = 0
+
+    with ExitStack() as stack:
+        connections = {}
+
+        def connect(engine):
+            # Origem e destino podem ser o mesmo arquivo: usa uma única conexão por banco
+            url = str(engine.url)
+            if url not in connections:
+                connections[url] = stack.enter_context(engine.begin())
+            return connections[url]
+
+        source_connections = [connect(engine) for engine in sources]
+        target_connections = [connect(engine) for engine in targets]
+
+        # Ids novos precisam ficar acima de todas as sequências que serão mantidas
+        kept = select(func.max(Post.id.op('>>')(BUCKET_BITS))).where(
+            Post.id.op('&')(BUCKET_MASK) == Post.user_id.op('&')(BUCKET_MASK)
+        )
+        highest = max((conn.execute(kept).scalar() or 0) for conn in source_connections)
+        for conn in set(target_connections):
+            reserve_sequence(conn, highest)
+
+        for source in dict.fromkeys(source_connections):
+            rows = source.execute(select(Post.__table__)).all()
+            for row in rows:
+                target = target_connections[(row.user_id & BUCKET_MASK) % len(targets)]
+                if target is source and has_shard_id(row.id, row.user_id):
+                    continue
+
+                new_id = row.id
+                if not has_shard_id(row.id, row.user_id):
+                    new_id = make_post_id(next_sequence(target), row.user_id)
+                    main = connect(db.engine)
+                    main.execute(
+                        FeedItem.__table__.update().where(FeedItem.post_id == row.id).values(post_id=new_id)
+                    )
+                    # Para quem sincroniza por /changes o post antigo some e o novo aparece
+                    main.execute(Change.__table__.insert(), [
+                        {'entity': 'post', 'entity_id': row.id, 'op': 'delete'},
+                        {'entity': 'post', 'entity_id': new_id, 'op': 'insert'},
+                    ])
+                    remapped += 1
+
+                source.execute(Post.__table__.delete().where(Post.id == row.id))
+                # Todas as colunas, inclusive as datas: o post não foi criado agora
+                target.execute(Post.__table__.insert(), {**row._asdict(), 'id': new_id})
+                if search.is_enabled():
+                    source.execute(search.DELETE_STATEMENT, {'id': row.id, 'content': row.content})
+                    target.execute(search.INSERT_STATEMENT, {'id': new_id, 'content': row.content})
+                moved += 1
+
+        # As posições das pendências valem para os shards antigos
+        connect(db.engine).execute(OutboxPosition.__table__.delete())
+
+    return moved, remapped
+
+if __name__ == '__main__':
+    uris = [uri.strip() for uri in sys.argv[1].split(',') if uri.strip()]
+    app = create_app({
+        'SQLALCHEMY_BINDS': {
+            **shard_binds(os.getenv('POST_SHARD_URIS', '')),
+            **{f'{TARGET_PREFIX}{i}': uri for i, uri in enumerate(uris)},
+        }
+    })
+    with app.app_context():
+        targets = [db.engines[f'{TARGET_PREFIX}{i}'] for i in range(len(uris))]
+        moved, remapped = reshard(targets)
+        print(f"{moved} post(s) movido(s), {remapped} com id novo")
+        print(f"Configure POST_SHARD_URIS={','.join(uris)}")
@@ -6,9 +6,10 @@ from models.user import User
 
 @pytest.fixture
 def client():
-    flask_app = create_app()
-    flask_app.config['TESTING'] = True
-    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    })
 
     with flask_app.test_client() as client:
         with flask_app.app_context():
@@ -0,0 +1,79 @@
+import pytest
+from app import create_app
+from models import db
+from models.user import User
+
+@pytest.fixture
+def client():
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    })
+
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            db.create_all()
+        # Usuário criado pela API, para que a criação entre no log de alterações
+        client.post("/users", json={"username": "user1", "password": "user1pass"})
+        yield client
+        with flask_app.app_context():
+            db.drop_all()
+
+def login_as(client, username):
+    with client.application.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return user
+
+def test_changes_requires_login(client):
+    response = client.get("/changes")
+    assert response.status_code == 401
+
+def test_changes_since_cursor(client):
+    user = login_as(client, "user1")
+    data = client.get("/changes").get_json()
+    assert [(c['entity'], c['op']) for c in data['changes']] == [('user', 'insert')]
+    assert data['changes'][0]['data']['username'] == "user1"
+    cursor = data['cursor']
+
+    # Sem alterações novas, nada é retornado e o cursor se mantém
+    data = client.get(f"/changes?since={cursor}").get_json()
+    assert data == {'changes': [], 'cursor': cursor, 'has_more': False}
+
+    client.post("/posts", json={"content": "Post"})
+    client.put(f"/users/{user.id}", json={"username": "user1_updated"})
+    data = client.get(f"/changes?since={cursor}").get_json()
+    assert [(c['entity'], c['op']) for c in data['changes']] == [('post', 'insert'), ('user', 'update')]
+    assert data['changes'][0]['data']['content'] == "Post"
+    assert data['changes'][1]['data']['username'] == "user1_updated"
+
+def test_changes_keeps_latest_per_entity_and_tombstones(client):
+    login_as(client, "user1")
+    cursor = client.get("/changes").get_json()['cursor']
+    client.post("/posts", json={"content": "Post"})
+    post_id = client.get("/posts").get_json()[0]['id']
+    client.put(f"/posts/{post_id}", json={"content": "Post editado"})
+    client.delete(f"/posts/{post_id}")
+
+    data = client.get(f"/changes?since={cursor}").get_json()
+    assert data['changes'] == [{'entity': 'post', 'id': post_id, 'op': 'delete', 'data': None}]
+
+def test_changes_pagination(client):
+    login_as(client, "user1")
+    for i in range(3):
+        client.post("/posts", json={"content": f"Post {i}"})
+    data = client.get("/changes?limit=2").get_json()
+    assert data['has_more'] is True
+    data = client.get(f"/changes?since={data['cursor']}&limit=2").get_json()
+    assert data['has_more'] is False
+    assert [c['data']['content'] for c in data['changes']] == ["Post 1", "Post 2"]
+
+def test_changes_limit_is_clamped(client):
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post"})
+    for limit in (0, -5):
+        data = client.get(f"/changes?limit={limit}").get_json()
+        # Pelo menos uma alteração por página: o cursor sempre avança
+        assert len(data['changes']) == 1
+        assert data['cursor'] > 0
@@ -0,0 +1,128 @@
+import pytest
+import bcrypt
+from app import create_app
+from models import db
+from models.user import User
+
+@pytest.fixture
+def client():
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'FEED_FANOUT_LIMIT': 1,
+    })
+
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            db.create_all()
+            # Cria três usuários comuns para testes
+            users = []
+            for username in ["user1", "user2", "user3"]:
+                password = bcrypt.hashpw(f"{username}pass".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                users.append(User(username=username, password=password))
+            db.session.add_all(users)
+            db.session.commit()
+        yield client
+        with flask_app.app_context():
+            db.drop_all()
+
+def login_as(client, username):
+    with client.application.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return user
+
+def test_feed_requires_login(client):
+    response = client.get("/feed")
+    assert response.status_code == 401
+    assert b"Login required" in response.data
+
+def test_follow_self_not_allowed(client):
+    user1 = login_as(client, "user1")
+    response = client.post(f"/users/{user1.id}/follow")
+    assert response.status_code == 400
+
+def test_feed_receives_posts_from_followed_users(client):
+    user1 = login_as(client, "user1")
+    client.post("/posts", json={"content": "Post antigo de user1"})
+
+    # user2 segue user1 e recebe os posts antigos (backfill) e novos (fan-out)
+    login_as(client, "user2")
+    response = client.post(f"/users/{user1.id}/follow")
+    assert response.status_code == 200
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post novo de user1"})
+
+    login_as(client, "user2")
+    response = client.get("/feed")
+    data = response.get_json()
+    assert [post['content'] for post in data] == ["Post novo de user1", "Post antigo de user1"]
+    assert data[0]['author']['id'] == user1.id
+    assert 'X-Next-Cursor' not in response.headers
+
+    # Paginação pelo cursor da página anterior
+    response = client.get("/feed?limit=1")
+    data = client.get(f"/feed?before={response.headers['X-Next-Cursor']}").get_json()
+    assert [post['content'] for post in data] == ["Post antigo de user1"]
+
+def test_unfollow_removes_posts_from_feed(client):
+    user1 = login_as(client, "user1")
+    client.post("/posts", json={"content": "Post de user1"})
+    login_as(client, "user2")
+    client.post(f"/users/{user1.id}/follow")
+    response = client.delete(f"/users/{user1.id}/follow")
+    assert response.status_code == 200
+    assert client.get("/feed").get_json() == []
+
+def test_feed_reads_posts_of_big_accounts(client):
+    # Com FEED_FANOUT_LIMIT = 1, user1 com dois seguidores não faz fan-out na escrita
+    user1 = login_as(client, "user1")
+    for username in ["user2", "user3"]:
+        login_as(client, username)
+        client.post(f"/users/{user1.id}/follow")
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post de conta grande"})
+
+    login_as(client, "user3")
+    client.post("/posts", json={"content": "Post de user3"})
+    data = client.get("/feed").get_json()
+    assert [post['content'] for post in data] == ["Post de user3", "Post de conta grande"]
+
+def test_deleted_post_leaves_feed(client):
+    user1 = login_as(client, "user1")
+    login_as(client, "user2")
+    client.post(f"/users/{user1.id}/follow")
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post que será deletado"})
+    post_id = client.get("/feed").get_json()[0]['id']
+    client.delete(f"/posts/{post_id}")
+    login_as(client, "user2")
+    assert client.get("/feed").get_json() == []
+
+def test_feed_keeps_posts_written_while_author_was_big(client):
+    user1 = login_as(client, "user1")
+    for username in ["user2", "user3"]:
+        login_as(client, username)
+        client.post(f"/users/{user1.id}/follow")
+
+    # Com 2 seguidores (acima do limite de 1) o post não é distribuído na escrita
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Enquanto grande"})
+
+    # user3 deixa de seguir: user1 volta a fazer fan-out, mas o post antigo continua no feed
+    login_as(client, "user3")
+    assert client.delete(f"/users/{user1.id}/follow").status_code == 200
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Depois"})
+
+    login_as(client, "user2")
+    data = client.get("/feed").get_json()
+    assert [post['content'] for post in data] == ["Depois", "Enquanto grande"]
+
+def test_feed_limit_is_clamped(client):
+    login_as(client, "user1")
+    for i in range(3):
+        client.post("/posts", json={"content": f"Post {i}"})
+    assert len(client.get("/feed?limit=-1").get_json()) == 1
+    assert len(client.get("/feed?limit=0").get_json()) == 1
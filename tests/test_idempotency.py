@@ -0,0 +1,101 @@
+import pytest
+import bcrypt
+from app import create_app
+from models import db
+from models.post import Post
+from models.user import User
+
+@pytest.fixture(params=['memory', 'database'])
+def client(request):
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'IDEMPOTENCY_STORE': request.param,
+    })
+
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            db.create_all()
+            password = bcrypt.hashpw("user1pass".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            db.session.add_all([User(username="user1", password=password), User(username="user2", password=password)])
+            db.session.commit()
+        yield client
+        with flask_app.app_context():
+            db.drop_all()
+
+def login_as(client, username):
+    with client.application.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return user
+
+def test_create_post_replay_returns_saved_response(client):
+    login_as(client, "user1")
+    headers = {'Idempotency-Key': 'abc-123'}
+    first = client.post("/posts", json={"content": "Post"}, headers=headers)
+    second = client.post("/posts", json={"content": "Post"}, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.data == first.data
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    with client.application.app_context():
+        assert Post.query.count() == 1
+
+def test_create_user_replay_skips_write_path(client, monkeypatch):
+    headers = {'Idempotency-Key': 'signup-1'}
+    payload = {"username": "novo", "password": "senha"}
+    assert client.post("/users", json=payload, headers=headers).status_code == 201
+
+    # A repetição não deve calcular outro hash bcrypt
+    def fail(*args, **kwargs):
+        raise AssertionError("hashpw chamado na repetição")
+    monkeypatch.setattr(bcrypt, 'hashpw', fail)
+    response = client.post("/users", json=payload, headers=headers)
+    assert response.status_code == 201
+    assert b"User created successfully" in response.data
+
+def test_key_reused_with_different_body(client):
+    login_as(client, "user1")
+    headers = {'Idempotency-Key': 'abc-123'}
+    client.post("/posts", json={"content": "Post"}, headers=headers)
+    response = client.post("/posts", json={"content": "Outro post"}, headers=headers)
+    assert response.status_code == 422
+
+def test_keys_are_scoped_per_user(client):
+    headers = {'Idempotency-Key': 'mesma-chave'}
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post"}, headers=headers)
+    login_as(client, "user2")
+    response = client.post("/posts", json={"content": "Post"}, headers=headers)
+    assert 'Idempotent-Replayed' not in response.headers
+    with client.application.app_context():
+        assert Post.query.count() == 2
+
+def test_expired_keys_are_not_replayed(client):
+    client.application.extensions['idempotency_store'].ttl = -1
+    login_as(client, "user1")
+    headers = {'Idempotency-Key': 'abc-123'}
+    client.post("/posts", json={"content": "Post"}, headers=headers)
+    response = client.post("/posts", json={"content": "Post"}, headers=headers)
+    assert 'Idempotent-Replayed' not in response.headers
+    with client.application.app_context():
+        assert Post.query.count() == 2
+
+def test_store_cleanup(client):
+    from models.idempotency import IdempotencyKey
+    store = client.application.extensions['idempotency_store']
+    login_as(client, "user1")
+    if hasattr(store, 'purge_expired'):
+        # Banco: chaves expiradas são apagadas durante as reservas seguintes
+        store.ttl = -1
+        store.cleanup_every = 1
+        for i in range(3):
+            client.post("/posts", json={"content": "Post"}, headers={'Idempotency-Key': f'k{i}'})
+        with client.application.app_context():
+            assert IdempotencyKey.query.count() == 1
+    else:
+        # Memória: LRU limitado a max_keys
+        store.max_keys = 2
+        for i in range(3):
+            client.post("/posts", json={"content": "Post"}, headers={'Idempotency-Key': f'k{i}'})
+        assert len(store._items) == 2
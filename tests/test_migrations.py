@@ -0,0 +1,94 @@
+import os
+import shutil
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade
+from sqlalchemy import inspect
+from app import create_app
+from models import db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS = os.path.join(ROOT, 'migrations')
+
+def upgraded_app(tmp_path):
+    # Cópia do banco distribuído com o projeto, atualizada até a última migração
+    path = tmp_path / 'socialmedia.db'
+    shutil.copy(os.path.join(ROOT, 'instance', 'socialmedia.db'), path)
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+    return app
+
+def test_upgrade_adds_post_count(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        columns = {column['name'] for column in inspect(db.engine).get_columns('users')}
+        assert 'post_count' in columns
+        # Contadores preenchidos a partir dos posts existentes
+        rows = db.session.execute(db.text(
+            "SELECT post_count, (SELECT COUNT(*) FROM posts WHERE user_id = users.id) FROM users"
+        )).all()
+        assert rows and all(count == expected for count, expected in rows)
+
+def test_upgrade_adds_feed_tables(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert {'follows', 'feed_items'} <= set(inspector.get_table_names())
+        # Os posts existentes aparecem no feed dos próprios autores
+        posts = db.session.execute(db.text("SELECT COUNT(*) FROM posts")).scalar()
+        items = db.session.execute(db.text("SELECT COUNT(*) FROM feed_items WHERE user_id = author_id")).scalar()
+        assert items == posts
+
+def test_upgrade_indexes_existing_posts(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        posts = db.session.execute(db.text("SELECT COUNT(*) FROM posts")).scalar()
+        indexed = db.session.execute(db.text("SELECT COUNT(*) FROM posts_fts")).scalar()
+        assert indexed == posts
+
+def test_upgrade_adds_timestamps(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert 'changes' in inspector.get_table_names()
+        for table in ('users', 'posts'):
+            columns = {column['name'] for column in inspector.get_columns(table)}
+            assert {'created_at', 'updated_at'} <= columns
+        missing = db.session.execute(db.text("SELECT COUNT(*) FROM posts WHERE created_at < '2000'")).scalar()
+        assert missing == 0
+        # Mesmo formato de texto que o SQLAlchemy grava
+        lengths = db.session.execute(db.text("SELECT DISTINCT length(created_at) FROM posts")).scalars().all()
+        assert lengths == [len('2026-01-01 00:00:00.000000')]
+
+def test_upgrade_adds_idempotency_keys(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        assert 'idempotency_keys' in inspect(db.engine).get_table_names()
+
+def test_upgrade_copies_post_dates_to_feed(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        assert 'cache_versions' in inspect(db.engine).get_table_names()
+        mismatched = db.session.execute(db.text(
+            "SELECT COUNT(*) FROM feed_items JOIN posts ON posts.id = feed_items.post_id "
+            "WHERE feed_items.created_at != posts.created_at"
+        )).scalar()
+        assert mismatched == 0
+
+def test_upgrade_adds_normalized_usernames(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context():
+        rows = db.session.execute(db.text("SELECT username, username_normalized FROM users")).all()
+        assert rows and all(normalized == username.casefold() for username, normalized in rows)
+    # O login lê o usuário com o esquema novo: credencial errada dá 401, não 500
+    response = app.test_client().post("/login", json={"username": "EDUARDO", "password": "errada"})
+    assert response.status_code == 401
+
+def test_upgraded_schema_matches_models(tmp_path):
+    app = upgraded_app(tmp_path)
+    with app.app_context(), db.engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={
+            'include_name': lambda name, type_, parent_names: not (name or '').startswith('posts_fts'),
+        })
+        assert compare_metadata(context, db.metadata) == []
@@ -7,9 +7,10 @@ from models.post import Post
 
 @pytest.fixture
 def client():
-    flask_app = create_app()
-    flask_app.config['TESTING'] = True
-    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    })
     
     with flask_app.test_client() as client:
         with flask_app.app_context():
@@ -201,4 +202,185 @@ def test_delete_post_by_admin_success(client):
     assert b"Post deleted successfully" in response.data
     with client.application.app_context():
         deleted_post = db.session.get(Post, post.id)
-        assert deleted_post is None
\ No newline at end of file
+        assert deleted_post is None
+
+def test_search_posts_requires_query(client):
+    login_as(client, "user1")
+    response = client.get("/posts/search")
+    assert response.status_code == 400
+
+def test_search_posts_follows_create_edit_delete(client):
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Café na praia"})
+    client.post("/posts", json={"content": "Reunião de trabalho"})
+
+    # Acentos são ignorados na busca
+    data = client.get("/posts/search?q=cafe").get_json()
+    assert [post['content'] for post in data] == ["Café na praia"]
+    assert data[0]['author']['username'] == "user1"
+
+    # A edição atualiza o índice
+    post_id = data[0]['id']
+    client.put(f"/posts/{post_id}", json={"content": "Almoço na praia"})
+    assert client.get("/posts/search?q=cafe").get_json() == []
+    assert len(client.get("/posts/search?q=praia").get_json()) == 1
+
+    # A deleção remove o post do índice
+    client.delete(f"/posts/{post_id}")
+    assert client.get("/posts/search?q=praia").get_json() == []
+
+def test_search_posts_ignores_fts_syntax(client):
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "AND OR NOT"})
+    response = client.get('/posts/search?q=AND "OR*')
+    assert response.status_code == 200
+
+def test_search_posts_limit_is_clamped(client):
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "hello mundo"})
+    client.post("/posts", json={"content": "hello de novo"})
+    response = client.get("/posts/search?q=hello&limit=-5")
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
+
+def test_get_posts_by_ids_preserves_order_and_reports_missing(client):
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post A"})
+    client.post("/posts", json={"content": "Post B"})
+    with client.application.app_context():
+        first, second = [post.id for post in Post.query.order_by(Post.id)]
+    response = client.get(f"/posts?ids={second},9999,{first}")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [post['content'] for post in data['posts']] == ["Post B", "Post A"]
+    assert data['posts'][0]['author']['username'] == "user1"
+    assert data['missing'] == [9999]
+
+def test_get_posts_by_ids_invalid(client):
+    login_as(client, "user1")
+    assert client.get("/posts?ids=1,abc").status_code == 400
+    assert client.get("/posts?ids=99999999999999999999").status_code == 400
+    assert client.get("/posts?ids=0,-1").status_code == 400
+    assert client.get("/posts?ids=" + ",".join(str(i) for i in range(101))).status_code == 400
+
+def test_list_posts_pagination(client):
+    login_as(client, "user1")
+    for i in range(3):
+        client.post("/posts", json={"content": f"Post {i}"})
+    response = client.get("/posts?limit=2")
+    assert [post['content'] for post in response.get_json()] == ["Post 2", "Post 1"]
+    cursor = response.headers['X-Next-Cursor']
+
+    # O cursor guarda a posição: continua valendo depois que o post é apagado
+    client.delete(f"/posts/{response.get_json()[-1]['id']}")
+    response = client.get(f"/posts?limit=2&before={cursor}")
+    assert [post['content'] for post in response.get_json()] == ["Post 0"]
+    assert 'X-Next-Cursor' not in response.headers
+
+def test_list_posts_invalid_cursor(client):
+    login_as(client, "user1")
+    for before in ("12345", "nao-e-cursor", "MjAyNi0wMS0wMXwtMQ"):
+        assert client.get(f"/posts?limit=2&before={before}").status_code == 400
+
+def test_first_page_is_served_from_cache(client, monkeypatch):
+    import controllers.post
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post 1"})
+
+    calls = []
+    recent_posts = controllers.post.recent_posts
+    monkeypatch.setattr(controllers.post, 'recent_posts', lambda *args: calls.append(args) or recent_posts(*args))
+    first = client.get("/posts?limit=10")
+    second = client.get("/posts?limit=5")
+    assert first.data == second.data
+    assert first.get_json()[0]['content'] == "Post 1"
+    assert len(calls) == 1
+    # Uma página cheia servida do cache também leva o cursor da próxima
+    client.post("/posts", json={"content": "Post 2"})
+    client.get("/posts?limit=10")
+    response = client.get("/posts?limit=1")
+    assert len(calls) == 2
+    next_page = client.get(f"/posts?limit=1&before={response.headers['X-Next-Cursor']}").get_json()
+    assert [post['content'] for post in next_page] == ["Post 1"]
+
+def test_page_cache_is_invalidated_by_writes(client):
+    user = login_as(client, "user1")
+    client.post("/posts", json={"content": "Post 1"})
+    assert [post['content'] for post in client.get("/posts?limit=10").get_json()] == ["Post 1"]
+
+    client.post("/posts", json={"content": "Post 2"})
+    data = client.get("/posts?limit=10").get_json()
+    assert [post['content'] for post in data] == ["Post 2", "Post 1"]
+
+    client.put(f"/posts/{data[0]['id']}", json={"content": "Post 2 editado"})
+    client.delete(f"/posts/{data[1]['id']}")
+    client.put(f"/users/{user.id}", json={"username": "user1_renomeado"})
+    data = client.get("/posts?limit=10").get_json()
+    assert [post['content'] for post in data] == ["Post 2 editado"]
+    assert data[0]['author']['username'] == "user1_renomeado"
+
+def test_page_cache_follows_version_from_other_processes(client):
+    from models.cache_version import POSTS_VERSION, CacheVersion
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post 1"})
+    client.get("/posts?limit=10")
+
+    # Outro processo altera o banco diretamente e incrementa a versão compartilhada
+    with client.application.app_context():
+        post = Post.query.first()
+        post.content = "Alterado por outro processo"
+        CacheVersion.bump(POSTS_VERSION)
+        db.session.commit()
+    data = client.get("/posts?limit=10").get_json()
+    assert data[0]['content'] == "Alterado por outro processo"
+
+def test_long_post_stored_compressed(client):
+    login_as(client, "user1")
+    content = "Texto longo de integração. " * 200
+    create_post_helper(client, content)
+    post_id = client.get("/posts").get_json()[0]['id']
+
+    with client.application.app_context():
+        stored = db.session.execute(
+            db.text("SELECT typeof(content), length(content) FROM posts WHERE id = :id"), {'id': post_id}
+        ).one()
+        assert stored[0] == 'blob'
+        assert stored[1] < len(content.encode('utf-8')) / 10
+
+    response = client.get(f"/posts/{post_id}")
+    assert response.get_json()['content'] == content
+    response = client.get("/posts/search?q=integração")
+    assert [p['id'] for p in response.get_json()] == [post_id]
+
+def test_search_index_keeps_no_copy_of_long_posts(client):
+    login_as(client, "user1")
+    create_post_helper(client, "Relatório da integração. " * 200)
+    post_id = client.get("/posts").get_json()[0]['id']
+
+    with client.application.app_context():
+        # Tabela contentless: só os termos, o texto fica apenas (comprimido) em posts
+        stored = db.session.execute(db.text("SELECT content FROM posts_fts")).scalars().all()
+        assert stored == [None]
+
+    # Edição e deleção retiram os termos do texto comprimido
+    client.put(f"/posts/{post_id}", json={"content": "Resumo curto"})
+    assert client.get("/posts/search?q=relatorio").get_json() == []
+    assert [p['id'] for p in client.get("/posts/search?q=resumo").get_json()] == [post_id]
+    client.delete(f"/posts/{post_id}")
+    assert client.get("/posts/search?q=resumo").get_json() == []
+
+def test_list_posts_preview(client):
+    user = login_as(client, "user1")
+    long_content = "Olá, conteúdo comprido! " * 300
+    create_post_helper(client, long_content)
+    create_post_helper(client, "Curto")
+
+    for url in ("/posts?preview=10", "/posts?limit=5&preview=10", f"/posts/user/{user.id}?preview=10"):
+        posts = {p['id']: p for p in client.get(url).get_json()}
+        previews = sorted((p['content'], p['truncated']) for p in posts.values())
+        assert previews == [("Curto", False), (long_content[:10], True)]
+
+    # Sem preview o texto volta inteiro
+    response = client.get("/posts?limit=5")
+    assert response.get_json()[0]['content'] == "Curto"
+    assert response.get_json()[1]['content'] == long_content
@@ -0,0 +1,80 @@
+import pstats
+import pytest
+import bcrypt
+from app import create_app
+from models import db
+from models.user import User
+
+@pytest.fixture
+def client(tmp_path):
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PROFILES_DIR': str(tmp_path / 'profiles'),
+        'PROFILES_MAX_FILES': 2,
+    })
+
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            db.create_all()
+            hashed = bcrypt.hashpw(b"adminpass", bcrypt.gensalt()).decode('utf-8')
+            db.session.add(User(username="admin", password=hashed, is_admin=True))
+            hashed = bcrypt.hashpw(b"user1pass", bcrypt.gensalt()).decode('utf-8')
+            db.session.add(User(username="user1", password=hashed))
+            db.session.commit()
+        yield client
+        with flask_app.app_context():
+            db.drop_all()
+
+def login_as(client, username):
+    with client.application.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return user
+
+def test_profile_requested_by_admin(client, tmp_path):
+    login_as(client, "admin")
+    response = client.get("/posts", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    name = response.headers['X-Profile-Id']
+    assert name.endswith('.pstats') and 'list_posts' in name
+
+    stats = pstats.Stats(str(tmp_path / 'profiles' / name))
+    assert any(func[2] == 'list_posts' for func in stats.stats)
+
+    response = client.get("/admin/profiles")
+    assert [p['name'] for p in response.get_json()] == [name]
+    response = client.get(f"/admin/profiles/{name}")
+    assert response.status_code == 200
+    assert len(response.data) > 0
+
+def test_profile_ignored_for_regular_user(client, tmp_path):
+    login_as(client, "user1")
+    response = client.get("/posts?_profile=1")
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+    assert not (tmp_path / 'profiles').exists()
+
+    assert client.get("/admin/profiles").status_code == 403
+
+def test_profiles_require_login(client):
+    assert client.get("/admin/profiles").status_code == 401
+
+def test_profiling_disabled(client):
+    client.application.config['PROFILING_ENABLED'] = False
+    login_as(client, "admin")
+    response = client.get("/posts", headers={"X-Profile": "1"})
+    assert 'X-Profile-Id' not in response.headers
+
+def test_old_profiles_pruned(client):
+    login_as(client, "admin")
+    names = [client.get("/posts?_profile=1").headers['X-Profile-Id'] for _ in range(3)]
+    listed = [p['name'] for p in client.get("/admin/profiles").get_json()]
+    assert len(listed) == 2
+    assert set(listed) <= set(names)
+
+def test_download_rejects_other_files(client):
+    login_as(client, "admin")
+    assert client.get("/admin/profiles/socialmedia.db").status_code == 404
+    assert client.get("/admin/profiles/..%2Fsecret.pstats").status_code == 404
@@ -0,0 +1,66 @@
+import pytest
+import bcrypt
+from app import create_app
+from models import db
+from models.user import User
+
+@pytest.fixture
+def client(tmp_path):
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_BINDS': {'replica_0': f'sqlite:///{tmp_path / "replica.db"}'},
+    })
+
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            db.create_all()
+            password = bcrypt.hashpw("user1pass".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            db.session.add(User(username="user1", password=password))
+            db.session.commit()
+
+            # A "réplica" recebe um conteúdo diferente para sabermos de onde veio a leitura
+            replica = db.engines['replica_0']
+            db.metadata.create_all(replica)
+            with replica.begin() as conn:
+                conn.execute(User.__table__.insert(), [
+                    {'username': 'user1', 'username_normalized': 'user1', 'password': password},
+                    {'username': 'replica_only', 'username_normalized': 'replica_only', 'password': password},
+                ])
+        yield client
+        with flask_app.app_context():
+            db.drop_all()
+        # O objeto db é global: remove o bind da réplica para não afetar os outros testes
+        db.metadatas.pop('replica_0', None)
+
+def login_as(client, username):
+    with client.application.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return user
+
+def usernames(client):
+    return {user['username'] for user in client.get("/users").get_json()}
+
+def test_get_requests_read_from_replica(client):
+    login_as(client, "user1")
+    assert usernames(client) == {"user1", "replica_only"}
+
+def test_reads_stick_to_primary_after_write(client):
+    login_as(client, "user1")
+    response = client.post("/posts", json={"content": "Escrita no principal"})
+    assert response.status_code == 201
+    assert usernames(client) == {"user1"}
+
+    # Passada a janela de stickiness, as leituras voltam para a réplica
+    with client.session_transaction() as sess:
+        sess['last_write_at'] -= client.application.config['REPLICA_STICKY_SECONDS']
+    assert usernames(client) == {"user1", "replica_only"}
+
+def test_writes_go_to_primary(client):
+    login_as(client, "user1")
+    client.post("/posts", json={"content": "Post"})
+    with client.application.app_context():
+        from models.post import Post
+        assert Post.query.count() == 1
@@ -0,0 +1,331 @@
+import sqlite3
+import pytest
+import bcrypt
+from sqlalchemy import create_engine
+from app import create_app
+from models import db
+from models.sharding import BUCKET_MASK, create_shard_tables
+from models.user import User
+
+SHARDS = 2
+
+@pytest.fixture
+def client(tmp_path):
+    binds = {f'posts_shard_{i}': f'sqlite:///{tmp_path / f"posts_{i}.db"}' for i in range(SHARDS)}
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_BINDS': binds,
+        # O banco principal em memória é uma conexão só: as pendências são aplicadas pelo teste
+        'POST_OUTBOX_APPLIER': False,
+    })
+    flask_app.config['SHARD_FILES'] = [tmp_path / f"posts_{i}.db" for i in range(SHARDS)]
+
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            db.create_all()
+            create_shard_tables()
+            # user1 e user2 ficam em shards diferentes (ids 1 e 2, buckets 1 e 2)
+            users = []
+            for username in ["user1", "user2", "admin"]:
+                password = bcrypt.hashpw(f"{username}pass".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                users.append(User(username=username, password=password, is_admin=username == "admin"))
+            db.session.add_all(users)
+            db.session.commit()
+        yield client
+        with flask_app.app_context():
+            db.drop_all()
+        # O objeto db é global: remove os binds dos shards para não afetar os outros testes
+        for key in binds:
+            db.metadatas.pop(key, None)
+
+def login_as(client, username):
+    with client.application.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return user
+
+def shard_rows(client, index):
+    # Lê o arquivo do shard diretamente, sem passar pela aplicação
+    path = client.application.config['SHARD_FILES'][index]
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT id, content, user_id FROM posts ORDER BY id").fetchall()
+
+def apply_outbox(client):
+    from models.outbox import apply_all_pending
+    with client.application.app_context():
+        return apply_all_pending()
+
+def create_post(client, username, content):
+    login_as(client, username)
+    response = client.post("/posts", json={"content": content})
+    assert response.status_code == 201
+    apply_outbox(client)
+
+def test_posts_are_written_to_author_shard(client):
+    create_post(client, "user1", "Post de user1")
+    create_post(client, "user2", "Post de user2")
+    user1_rows = shard_rows(client, 1)
+    user2_rows = shard_rows(client, 0)
+    assert [row[1] for row in user1_rows] == ["Post de user1"]
+    assert [row[1] for row in user2_rows] == ["Post de user2"]
+    # O id carrega o bucket do autor
+    assert user1_rows[0][0] & BUCKET_MASK == 1
+
+def test_get_edit_delete_route_to_one_shard(client):
+    create_post(client, "user1", "Post original")
+    post_id = shard_rows(client, 1)[0][0]
+
+    response = client.get(f"/posts/{post_id}")
+    assert response.status_code == 200
+    assert response.get_json()['author']['username'] == "user1"
+
+    response = client.put(f"/posts/{post_id}", json={"content": "Post editado"})
+    assert response.status_code == 200
+    assert shard_rows(client, 1)[0][1] == "Post editado"
+
+    response = client.delete(f"/posts/{post_id}")
+    assert response.status_code == 200
+    assert shard_rows(client, 1) == []
+
+def test_list_posts_merges_all_shards(client):
+    create_post(client, "user1", "Post 1")
+    create_post(client, "user2", "Post 2")
+    create_post(client, "user1", "Post 3")
+    data = client.get("/posts").get_json()
+    assert sorted(post['content'] for post in data) == ["Post 1", "Post 2", "Post 3"]
+    ids = [post['id'] for post in data]
+    assert ids == sorted(ids)
+
+    user1 = login_as(client, "user1")
+    data = client.get(f"/posts/user/{user1.id}").get_json()
+    assert sorted(post['content'] for post in data) == ["Post 1", "Post 3"]
+    assert client.get(f"/users/{user1.id}/stats").get_json()['post_count'] == 2
+
+def test_search_and_feed_across_shards(client):
+    create_post(client, "user1", "Café de user1")
+    create_post(client, "user2", "Café de user2")
+    data = client.get("/posts/search?q=cafe").get_json()
+    assert sorted(post['author']['username'] for post in data) == ["user1", "user2"]
+
+    user1 = login_as(client, "user1")
+    login_as(client, "user2")
+    client.post(f"/users/{user1.id}/follow")
+    data = client.get("/feed").get_json()
+    assert sorted(post['content'] for post in data) == ["Café de user1", "Café de user2"]
+
+def test_reshard_moves_posts_and_keeps_ids(client, tmp_path):
+    from reshard_posts import reshard
+    create_post(client, "user1", "Post de user1")
+    create_post(client, "user2", "Post de user2")
+    create_post(client, "admin", "Post de admin")
+    before = {post['id']: post['content'] for post in client.get("/posts").get_json()}
+    created = {}
+    for path in client.application.config['SHARD_FILES']:
+        with sqlite3.connect(path) as conn:
+            created.update(conn.execute("SELECT id, created_at FROM posts").fetchall())
+
+    # Três novos shards: os buckets 1, 2 e 3 vão para shards diferentes
+    targets = [create_engine(f'sqlite:///{tmp_path / f"new_{i}.db"}') for i in range(3)]
+    with client.application.app_context():
+        moved, remapped = reshard(targets)
+    assert (moved, remapped) == (3, 0)
+    assert shard_rows(client, 0) == [] and shard_rows(client, 1) == []
+
+    after = {}
+    for i in range(3):
+        with sqlite3.connect(tmp_path / f"new_{i}.db") as conn:
+            rows = conn.execute("SELECT id, content, user_id, created_at FROM posts").fetchall()
+        assert len(rows) == 1
+        post_id, content, user_id, created_at = rows[0]
+        assert (user_id & BUCKET_MASK) % 3 == i
+        assert created_at == created[post_id]
+        after[post_id] = content
+    assert after == before
+
+def test_reshard_from_unsharded_database_assigns_new_ids(tmp_path):
+    from reshard_posts import reshard
+    from models.feed import FeedItem
+    main_uri = f'sqlite:///{tmp_path / "main.db"}'
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': main_uri,
+        'SQLALCHEMY_BINDS': {},
+    })
+    client = flask_app.test_client()
+    with flask_app.app_context():
+        db.create_all()
+        db.session.add_all([User(username="user1", password="x"), User(username="user2", password="x")])
+        db.session.commit()
+    create_post(client, "user2", "Primeiro post")
+    create_post(client, "user2", "Segundo post")
+    cursor = client.get("/changes").get_json()['cursor']
+
+    targets = [create_engine(f'sqlite:///{tmp_path / f"new_{i}.db"}') for i in range(2)]
+    with flask_app.app_context():
+        # Ids 1 e 2 não carregam o bucket do autor (2): o primeiro recebe id novo
+        moved, remapped = reshard(targets)
+        assert (moved, remapped) == (2, 1)
+        feed_ids = sorted(item.post_id for item in FeedItem.query.all())
+
+    with sqlite3.connect(tmp_path / "new_0.db") as conn:
+        rows = conn.execute("SELECT id, content FROM posts ORDER BY id").fetchall()
+    assert [content for _, content in rows] == ["Segundo post", "Primeiro post"]
+    assert all(post_id & BUCKET_MASK == 2 for post_id, _ in rows)
+    assert feed_ids == sorted(post_id for post_id, _ in rows)
+
+    # Com a nova configuração, /changes troca o id antigo pelo novo
+    binds = {f'posts_shard_{i}': f'sqlite:///{tmp_path / f"new_{i}.db"}' for i in range(2)}
+    sharded_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': main_uri, 'SQLALCHEMY_BINDS': binds})
+    try:
+        sharded_client = sharded_app.test_client()
+        login_as(sharded_client, "user2")
+        changes = sharded_client.get(f"/changes?since={cursor}").get_json()['changes']
+        new_id = rows[-1][0]
+        assert [(change['op'], change['id']) for change in changes] == [('delete', 1), ('insert', new_id)]
+        assert changes[1]['data']['content'] == "Primeiro post"
+        with sharded_app.app_context():
+            db.drop_all()
+    finally:
+        for key in binds:
+            db.metadatas.pop(key, None)
+
+def test_delete_user_removes_posts_from_shard(client):
+    create_post(client, "user1", "Post de user1")
+    create_post(client, "user2", "Post de user2")
+    user1 = login_as(client, "user1")
+    response = client.delete(f"/users/{user1.id}")
+    assert response.status_code == 200
+    assert shard_rows(client, 1) == []
+
+    login_as(client, "user2")
+    for url in ("/posts", "/posts?limit=5"):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert [post['content'] for post in response.get_json()] == ["Post de user2"]
+    assert client.get("/posts/search?q=user1").get_json() == []
+
+def test_recent_posts_follow_creation_time_across_shards(client):
+    # Os ids de user2 (shard 0) ficam acima do id do post mais novo, de user1 (shard 1)
+    for content in ["b1", "b2", "b3"]:
+        create_post(client, "user2", content)
+    create_post(client, "user1", "a1")
+
+    login_as(client, "admin")
+    first = client.get("/posts?limit=2")
+    assert [post['content'] for post in first.get_json()] == ["a1", "b3"]
+    # De novo, agora servido pelo cache
+    cached = client.get("/posts?limit=2")
+    assert cached.data == first.data
+    assert cached.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+    second = client.get(f"/posts?limit=2&before={first.headers['X-Next-Cursor']}").get_json()
+    assert [post['content'] for post in second] == ["b2", "b1"]
+    assert [post['content'] for post in client.get("/posts").get_json()] == ["b1", "b2", "b3", "a1"]
+
+    # O feed segue a mesma ordem
+    user1 = login_as(client, "user1")
+    user2 = login_as(client, "user2")
+    login_as(client, "admin")
+    client.post(f"/users/{user1.id}/follow")
+    client.post(f"/users/{user2.id}/follow")
+    response = client.get("/feed?limit=2")
+    assert [post['content'] for post in response.get_json()] == ["a1", "b3"]
+    feed = client.get(f"/feed?limit=2&before={response.headers['X-Next-Cursor']}").get_json()
+    assert [post['content'] for post in feed] == ["b2", "b1"]
+
+def test_cursor_survives_deleted_post(client):
+    for content in ["b1", "b2"]:
+        create_post(client, "user2", content)
+    user2 = login_as(client, "user2")
+    login_as(client, "admin")
+    client.post(f"/users/{user2.id}/follow")
+    pages = {url: client.get(url) for url in ("/posts?limit=1", "/feed?limit=1")}
+
+    # O post que encerra a página é apagado antes do pedido da próxima
+    login_as(client, "user2")
+    client.delete(f"/posts/{pages['/feed?limit=1'].get_json()[0]['id']}")
+    login_as(client, "admin")
+    for url, response in pages.items():
+        assert [post['content'] for post in response.get_json()] == ["b2"]
+        next_page = client.get(f"{url}&before={response.headers['X-Next-Cursor']}")
+        assert next_page.status_code == 200
+        assert [post['content'] for post in next_page.get_json()] == ["b1"]
+    assert client.get("/feed?before=12345").status_code == 400
+
+def outbox_rows(client, index):
+    path = client.application.config['SHARD_FILES'][index]
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT post_id, user_id FROM post_outbox").fetchall()
+
+def test_post_bookkeeping_goes_through_shard_outbox(client):
+    user1 = login_as(client, "user1")
+    assert client.post("/posts", json={"content": "Post de user1"}).status_code == 201
+    post_id = shard_rows(client, 1)[0][0]
+
+    # Só o shard foi alterado: o post e a pendência, na mesma transação
+    assert outbox_rows(client, 1) == [(post_id, user1.id)]
+    assert client.get(f"/users/{user1.id}/stats").get_json()['post_count'] == 0
+    assert client.get("/feed").get_json() == []
+
+    assert apply_outbox(client) == 1
+    assert client.get(f"/users/{user1.id}/stats").get_json()['post_count'] == 1
+    assert [post['id'] for post in client.get("/feed").get_json()] == [post_id]
+    changes = client.get("/changes").get_json()['changes']
+    assert [(change['op'], change['id']) for change in changes if change['entity'] == 'post'] == [('insert', post_id)]
+
+    # Cada pendência é aplicada uma única vez e sai do shard
+    assert apply_outbox(client) == 0
+    assert outbox_rows(client, 1) == []
+    assert client.get(f"/users/{user1.id}/stats").get_json()['post_count'] == 1
+
+def test_outbox_tolerates_follow_and_delete_before_apply(client):
+    user1 = login_as(client, "user1")
+    client.post("/posts", json={"content": "Post mantido"})
+    client.post("/posts", json={"content": "Post apagado"})
+    kept_id, deleted_id = [row[0] for row in shard_rows(client, 1)]
+
+    # user2 segue antes do fan-out (backfill) e o segundo post é apagado antes da aplicação
+    login_as(client, "user2")
+    client.post(f"/users/{user1.id}/follow")
+    login_as(client, "user1")
+    client.delete(f"/posts/{deleted_id}")
+
+    assert apply_outbox(client) == 2
+    assert client.get(f"/users/{user1.id}/stats").get_json()['post_count'] == 1
+    login_as(client, "user2")
+    assert [post['id'] for post in client.get("/feed").get_json()] == [kept_id]
+    changes = client.get("/changes").get_json()['changes']
+    assert [(change['op'], change['id']) for change in changes if change['entity'] == 'post'] == [
+        ('delete', deleted_id), ('insert', kept_id)
+    ]
+
+def test_outbox_applier_thread(tmp_path):
+    import time
+    binds = {f'posts_shard_{i}': f'sqlite:///{tmp_path / f"posts_{i}.db"}' for i in range(SHARDS)}
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "main.db"}',
+        'SQLALCHEMY_BINDS': binds,
+        'POST_OUTBOX_INTERVAL_MS': 50,
+    })
+    try:
+        with flask_app.app_context():
+            db.create_all()
+            create_shard_tables()
+            db.session.add(User(username="user1", password="x"))
+            db.session.commit()
+        client = flask_app.test_client()
+        user1 = login_as(client, "user1")
+        for content in ["Post 1", "Post 2"]:
+            assert client.post("/posts", json={"content": content}).status_code == 201
+
+        # Aplicado pela thread, sem chamada explícita
+        deadline = time.monotonic() + 5
+        while client.get(f"/users/{user1.id}/stats").get_json()['post_count'] < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        assert len(client.get("/feed").get_json()) == 2
+    finally:
+        for key in binds:
+            db.metadatas.pop(key, None)
@@ -6,9 +6,10 @@ from models.user import User
 
 @pytest.fixture
 def client():
-    flask_app = create_app()
-    flask_app.config['TESTING'] = True
-    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    })
     
     with flask_app.test_client() as client:
         with flask_app.app_context():
@@ -121,4 +122,97 @@ def test_delete_user_by_admin_success(client):
     assert b"User deleted successfully" in response.data
     with client.application.app_context():
         deleted_user = db.session.get(User, user1.id)
-        assert deleted_user is None
\ No newline at end of file
+        assert deleted_user is None
+
+def test_user_stats_requires_login(client):
+    response = client.get("/users/1/stats")
+    assert response.status_code == 401
+    assert b"Login required" in response.data
+
+def test_user_stats_tracks_post_count(client):
+    user = login_as(client, "user1")
+    client.post("/posts", json={"content": "Post 1"})
+    client.post("/posts", json={"content": "Post 2"})
+    response = client.get(f"/users/{user.id}/stats")
+    assert response.status_code == 200
+    assert response.get_json()['post_count'] == 2
+
+    # Deletar um post decrementa o contador
+    with client.application.app_context():
+        from models.post import Post
+        post = Post.query.first()
+    client.delete(f"/posts/{post.id}")
+    response = client.get(f"/users/{user.id}/stats")
+    assert response.get_json()['post_count'] == 1
+
+def test_get_users_by_ids(client):
+    login_as(client, "user1")
+    with client.application.app_context():
+        admin = User.query.filter_by(username="admin").first()
+        user2 = User.query.filter_by(username="user2").first()
+    response = client.get(f"/users?ids={admin.id},{user2.id},9999")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [user['username'] for user in data['users']] == ["admin", "user2"]
+    assert data['users'][0]['is_admin'] is True
+    assert data['missing'] == [9999]
+    assert client.get(f"/users?ids={2 ** 63}").status_code == 400
+
+def username_available(client, username):
+    response = client.get(f"/users/available?username={username}")
+    assert response.status_code == 200
+    return response.get_json()['available']
+
+def test_username_available(client):
+    assert client.get("/users/available").status_code == 400
+    assert username_available(client, "novo") is True
+    assert username_available(client, "user1") is False
+    assert username_available(client, "USER1") is False
+
+    client.post("/users", json={"username": "Novo", "password": "x"})
+    assert username_available(client, "novo") is False
+
+def test_create_user_duplicate_ignores_case(client):
+    response = client.post("/users", json={"username": "User1", "password": "x"})
+    assert response.status_code == 400
+
+def test_username_index_follows_rename_and_delete(client):
+    user = login_as(client, "user1")
+    assert username_available(client, "renomeado") is True
+
+    response = client.put(f"/users/{user.id}", json={"username": "user2"})
+    assert response.status_code == 400
+    client.put(f"/users/{user.id}", json={"username": "Renomeado"})
+    assert username_available(client, "renomeado") is False
+    assert username_available(client, "user1") is True
+
+    client.delete(f"/users/{user.id}")
+    assert username_available(client, "renomeado") is True
+
+def test_username_index_confirms_positives_in_database(client):
+    # Usuário removido por fora da API (outro processo): o índice ainda o tem,
+    # mas a resposta "em uso" é confirmada no banco
+    assert username_available(client, "user2") is False
+    with client.application.app_context():
+        User.query.filter_by(username="user2").delete()
+        db.session.commit()
+    assert username_available(client, "user2") is True
+
+def test_delete_user_removes_posts(client):
+    user = login_as(client, "user1")
+    client.post("/posts", json={"content": "Post que vai sumir"})
+    response = client.delete(f"/users/{user.id}")
+    assert response.status_code == 200
+
+    login_as(client, "user2")
+    assert client.get("/posts").get_json() == []
+    assert client.get("/posts/search?q=sumir").get_json() == []
+    changes = client.get("/changes").get_json()['changes']
+    assert ('post', 'delete') in [(c['entity'], c['op']) for c in changes]
+
+def test_username_uniqueness_folds_non_ascii_case(client):
+    response = client.post("/users", json={"username": "ÉDOUARD", "password": "x"})
+    assert response.status_code == 201
+    assert username_available(client, "édouard") is False
+    response = client.post("/users", json={"username": "édouard", "password": "x"})
+    assert response.status_code == 400
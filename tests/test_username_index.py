@@ -0,0 +1,11 @@
+from models.username_index import BloomFilter
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    names = [f"user{i}" for i in range(1000)]
+    for name in names:
+        bloom.add(name)
+    assert all(name in bloom for name in names)
+
+    false_positives = sum(f"other{i}" in bloom for i in range(10000))
+    assert false_positives < 300
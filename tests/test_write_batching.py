@@ -0,0 +1,114 @@
+import threading
+import pytest
+import bcrypt
+from app import create_app
+from models import db
+from models.post import Post
+from models.user import User
+
+@pytest.fixture
+def app(tmp_path):
+    # Banco em arquivo: a thread escritora usa sua própria conexão
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "batching.db"}',
+        'POST_WRITE_BATCHING': True,
+        'POST_BATCH_WINDOW_MS': 50,
+    })
+    with flask_app.app_context():
+        db.create_all()
+        password = bcrypt.hashpw("user1pass".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        db.session.add(User(username="user1", password=password))
+        db.session.commit()
+    yield flask_app
+    with flask_app.app_context():
+        db.drop_all()
+
+def logged_client(app, username):
+    client = app.test_client()
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user.id
+    return client
+
+def test_concurrent_posts_are_committed_in_batches(app):
+    batcher = app.extensions['post_write_batcher']
+    batch_sizes = []
+    persist = batcher.persist
+    batcher.persist = lambda items: batch_sizes.append(len(items)) or persist(items)
+
+    statuses = []
+    def worker(i):
+        client = logged_client(app, "user1")
+        statuses.append(client.post("/posts", json={"content": f"Post {i}"}).status_code)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Todas as requisições só responderam depois do commit do seu lote
+    assert statuses == [201] * 10
+    assert sum(batch_sizes) == 10
+    assert len(batch_sizes) < 10
+    with app.app_context():
+        assert Post.query.count() == 10
+        assert User.query.filter_by(username="user1").first().post_count == 10
+
+def test_failed_item_does_not_fail_batch(app):
+    batcher = app.extensions['post_write_batcher']
+    results = []
+    def submit(item):
+        try:
+            results.append(batcher.submit(item))
+        except KeyError:
+            results.append('erro')
+
+    with app.app_context():
+        user_id = User.query.first().id
+    # O segundo item tem um autor inexistente
+    threads = [threading.Thread(target=submit, args=(item,))
+               for item in [(user_id, "ok 1"), (9999, "sem autor"), (user_id, "ok 2")]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count('erro') == 1
+    with app.app_context():
+        assert sorted(post.content for post in Post.query.all()) == ["ok 1", "ok 2"]
+
+def test_writer_survives_failure_outside_persist(app, monkeypatch):
+    batcher = app.extensions['post_write_batcher']
+    with app.app_context():
+        user_id = User.query.first().id
+
+    # Um erro no rollback escapa do try interno de _write
+    def broken_persist(items):
+        raise RuntimeError("falha no persist")
+    def broken_rollback():
+        raise RuntimeError("falha no rollback")
+    monkeypatch.setattr(batcher, 'persist', broken_persist)
+    monkeypatch.setattr(db.session, 'rollback', broken_rollback)
+    with pytest.raises(RuntimeError, match="rollback"):
+        batcher.submit((user_id, "perdido"))
+    monkeypatch.undo()
+
+    # A thread continua viva e atende os próximos itens
+    assert batcher.submit((user_id, "gravado")) is not None
+    with app.app_context():
+        assert [post.content for post in Post.query.all()] == ["gravado"]
+
+def test_submit_times_out(app):
+    batcher = app.extensions['post_write_batcher']
+    batcher.timeout = 0.05
+    release = threading.Event()
+    persist = batcher.persist
+    batcher.persist = lambda items: release.wait() and persist(items)
+
+    client = logged_client(app, "user1")
+    response = client.post("/posts", json={"content": "Post lento"})
+    assert response.status_code == 503
+    release.set()